@@ -1,27 +1,54 @@
 # ct: Config Table sphinx extensions for documentation.
 #
 # See README.md or files for detailed documentation and config values.
+#
+# Directives and roles are imported on first use (see lazy.py); keep imports
+# here limited to modules needed to connect build events.
 
-import re
+from . import cache
 from . import config
+from . import elements
+from . import export
+from . import factory
+from . import index
+from . import lazy
+from . import sources
+from . import timing
+
+from .v2 import admx
+from .v2 import badges
+from .v2 import conflicts
+from .v2 import regkeys
 
-from .v2 import cmdmenu
-from .v2 import files
-from .v2 import gpo
-from .v2 import gui
-from .v2 import ports
-from .v2 import regedit
+# Directive name: (module, class name).
+DIRECTIVES = {
+  'files': ('.v2.files', 'Files'),
+  'gpo': ('.v2.gpo', 'Gpo'),
+  'gui': ('.v2.gui', 'Gui'),
+  'ports': ('.v2.ports', 'Ports'),
+  'regedit': ('.v2.regedit', 'Regedit'),
+  'regtree': ('.v2.regtree', 'RegTree'),
+}
 
 def setup(app):
-  app.add_config_value('ct_separator', config.DEFAULT_SEPARATOR, '')
-  app.add_config_value('ct_separator_replace', config.DEFAULT_REPLACE, '')
+  config.setup(app)
+  elements.setup(app)
+  app.connect('builder-inited', badges.reset)
+  app.connect('builder-inited', cache.reset)
+  app.connect('build-finished', cache.report)
+  sources.setup(app)
+  timing.setup(app)
+  admx.setup(app)
+  badges.setup(app)
+  factory.setup(app)
+  index.setup(app)
+  conflicts.setup(app)
+  export.setup(app)
+  regkeys.setup(app)
 
-  cmdmenu.setup(app)
-  files.setup(app)
-  gpo.setup(app)
-  gui.setup(app)
-  ports.setup(app)
-  regedit.setup(app)
+  for name, (module, cls) in DIRECTIVES.items():
+    app.add_directive(name, lazy.directive(module, cls))
+  app.add_role('cmdmenu', lazy.role('.v2.cmdmenu', 'CmdMenu'))
 
   return {
     'version': '0.1',
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# Scaling benchmark for config table extensions.
+#
+# Generates synthetic sphinx projects (see corpus.py) for each size step, runs
+# a real sphinx build in a subprocess and records wall time, peak RSS and the
+# size of the pickled doctrees.
+#
+# Usage:
+#   Scale documents, mixing all directives:
+#     python benchmarks/bench.py --docs 10,100,1000,10000 --tables 10 --rows 20
+#
+#   Scale a single directive by tables per page:
+#     python benchmarks/bench.py --directive ports --docs 100 --tables 1,10,100,500
+#
+#   Record results and check for regressions against a previous run:
+#     python benchmarks/bench.py --docs 100,1000 --output new.json \
+#         --baseline old.json --tolerance 0.2
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS = ('wall', 'rss_kib', 'doctree_bytes')
+
+def _ints(value):
+  return [int(x) for x in value.split(',')]
+
+def _site(tmp):
+  """Create a site directory exposing this checkout as 'sphinx-configtable'.
+
+  Args:
+    tmp: String temporary directory to create the site directory in.
+
+  Returns:
+    String site directory to add to sys.path.
+  """
+  site = os.path.join(tmp, 'site')
+  os.makedirs(site, exist_ok=True)
+  link = os.path.join(site, 'sphinx-configtable')
+  if not os.path.exists(link):
+    os.symlink(ROOT, link)
+  return site
+
+def _size(path, suffix):
+  """Return total size in bytes of files ending in suffix under path."""
+  total = 0
+  for dirpath, _, filenames in os.walk(path):
+    for name in filenames:
+      if name.endswith(suffix):
+        total += os.path.getsize(os.path.join(dirpath, name))
+  return total
+
+def build(src, out, builder='html', jobs=1):
+  """Run a full sphinx build in a subprocess.
+
+  Args:
+    src: String sphinx source directory.
+    out: String build directory. Doctrees are written to out/.doctrees.
+    builder: String sphinx builder. Default: 'html'.
+    jobs: Integer parallel jobs (-j). Default: 1.
+
+  Returns:
+    Tuple of (Float wall time in seconds, Integer peak RSS in KiB).
+
+  Raises:
+    RuntimeError: if the build fails.
+  """
+  cmd = [sys.executable, '-m', 'sphinx', '-q', '-E', '-b', builder,
+         '-d', os.path.join(out, '.doctrees'), '-j', str(jobs),
+         src, os.path.join(out, builder)]
+  start = time.perf_counter()
+  proc = subprocess.Popen(cmd)
+  _, status, usage = os.wait4(proc.pid, 0)
+  wall = time.perf_counter() - start
+  proc.returncode = os.waitstatus_to_exitcode(status)
+  if proc.returncode:
+    raise RuntimeError('build failed (%d): %s' % (proc.returncode, ' '.join(cmd)))
+  return wall, usage.ru_maxrss
+
+def run_step(tmp, docs, tables, rows, directives, builder, jobs, repeat, seed):
+  """Generate and build a single size step.
+
+  Returns:
+    Dictionary containing step parameters and measured metrics. Wall time is
+    the minimum and RSS the maximum over repeat builds.
+  """
+  src = os.path.join(tmp, 'src')
+  out = os.path.join(tmp, 'out')
+  shutil.rmtree(src, ignore_errors=True)
+  counts = corpus.generate(src, _site(tmp), docs, tables, rows, directives, seed)
+  walls = []
+  rss = 0
+  for _ in range(repeat):
+    shutil.rmtree(out, ignore_errors=True)
+    wall, peak = build(src, out, builder, jobs)
+    walls.append(wall)
+    rss = max(rss, peak)
+  return {
+    'directives': sorted(directives),
+    'docs': docs,
+    'tables': tables,
+    'rows': rows,
+    'builder': builder,
+    'jobs': jobs,
+    'counts': counts,
+    'wall': min(walls),
+    'rss_kib': rss,
+    'doctree_bytes': _size(os.path.join(out, '.doctrees'), '.doctree'),
+  }
+
+def _step_key(result):
+  return (tuple(result['directives']), result['docs'], result['tables'],
+          result['rows'], result['builder'], result['jobs'])
+
+def compare(results, baseline, tolerance):
+  """Compare results against baseline results.
+
+  Args:
+    results: List of result dictionaries from run_step().
+    baseline: List of result dictionaries from a previous run.
+    tolerance: Float allowed relative increase (e.g. 0.2 for 20%).
+
+  Returns:
+    List of Strings describing each regression.
+  """
+  previous = {_step_key(r): r for r in baseline}
+  regressions = []
+  for result in results:
+    old = previous.get(_step_key(result))
+    if not old:
+      continue
+    for metric in METRICS:
+      if old[metric] and result[metric] > old[metric] * (1 + tolerance):
+        regressions.append('%s docs=%d tables=%d rows=%d: %s %s -> %s' % (
+            ','.join(result['directives']), result['docs'], result['tables'],
+            result['rows'], metric, old[metric], result[metric]))
+  return regressions
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Config table scaling benchmark.')
+  parser.add_argument('--docs', type=_ints, default=[10, 100],
+                      help='Comma separated document counts (10..10000).')
+  parser.add_argument('--tables', type=_ints, default=[10],
+                      help='Comma separated tables per document (1..500).')
+  parser.add_argument('--rows', type=_ints, default=[10],
+                      help='Comma separated maximum rows per table.')
+  parser.add_argument('--directive', action='append', choices=corpus.DIRECTIVES,
+                      help='Directive to benchmark, may be repeated. Default: all.')
+  parser.add_argument('--builder', default='html')
+  parser.add_argument('--jobs', type=int, default=1)
+  parser.add_argument('--repeat', type=int, default=1)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--output', help='Write JSON results to this file.')
+  parser.add_argument('--baseline', help='JSON results to check regressions against.')
+  parser.add_argument('--tolerance', type=float, default=0.2)
+  parser.add_argument('--keep', help='Generate projects in this directory.')
+  args = parser.parse_args(argv)
+
+  directives = args.directive or corpus.DIRECTIVES
+  tmp = args.keep or tempfile.mkdtemp(prefix='ct-bench-')
+  results = []
+  print('%-8s %-6s %-6s %10s %12s %14s' % (
+      'docs', 'tables', 'rows', 'wall (s)', 'rss (KiB)', 'doctree (B)'))
+  try:
+    for docs in args.docs:
+      for tables in args.tables:
+        for rows in args.rows:
+          result = run_step(tmp, docs, tables, rows, directives, args.builder,
+                            args.jobs, args.repeat, args.seed)
+          results.append(result)
+          print('%-8d %-6d %-6d %10.2f %12d %14d' % (
+              docs, tables, rows, result['wall'], result['rss_kib'],
+              result['doctree_bytes']), flush=True)
+  finally:
+    if not args.keep:
+      shutil.rmtree(tmp, ignore_errors=True)
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(results, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      regressions = compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+      print('REGRESSION: %s' % regression)
+    if regressions:
+      return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,140 @@
+# Synthetic sphinx project generator for config table benchmarks.
+#
+# Generates a sphinx project with a configurable number of documents, tables
+# per document and rows per table, mixing all config table directives and the
+# :cmdmenu: role. Generation is deterministic for a given seed.
+
+import os
+import random
+
+# Directives (and roles) available for generated documents.
+DIRECTIVES = ('gpo', 'gui', 'regedit', 'ports', 'files', 'cmdmenu')
+
+# Maximum number of :value{N}: rows supported per directive. Additional rows
+# are generated in a :values: block.
+MAX_ROWS = {
+  'files': 21,
+  'gpo': 31,
+  'gui': 36,
+  'ports': 21,
+  'regedit': 10,
+}
+
+CONF = """\
+import sys
+sys.path.insert(0, %(site)r)
+project = 'ct-benchmark'
+extensions = ['sphinx-configtable']
+master_doc = 'index'
+exclude_patterns = ['_build']
+"""
+
+WORDS = ('Settings', 'Network', 'Security', 'Audit', 'Firewall', 'Update',
+         'Service', 'Account', 'Policy', 'Storage', 'Display', 'Logon')
+
+def _path(rng, rep, depth=4):
+  """Generate a menu path using rep as separator."""
+  return (' %s ' % rep).join(rng.choice(WORDS) for _ in range(depth))
+
+def _regedit_row(rng, i):
+  return 'Value%d, %s, %d' % (i, rng.choice(('{DWORD}', '{SZ}', '{QWORD}')), i)
+
+def _ports_row(rng, i):
+  return '%d, %s, %s, Service %d port.' % (
+      rng.randint(1, 65535), rng.choice(('{TCP}', '{UDP}')),
+      rng.choice(('{PUBLIC}', '{PRIVATE}')), i)
+
+def _files_row(rng, i):
+  return '/data/%s/file%d.conf, %s configuration' % (
+      rng.choice(WORDS).lower(), i, rng.choice(WORDS))
+
+def _gpo_row(rng, i):
+  return '☑, %s %d' % (rng.choice(WORDS), i)
+
+def _gui_row(rng, i):
+  return '%s option %d, %s' % (rng.choice(WORDS), i, rng.choice(('{ON}', '{OFF}')))
+
+ROWS = {
+  'files': _files_row,
+  'gpo': _gpo_row,
+  'gui': _gui_row,
+  'ports': _ports_row,
+  'regedit': _regedit_row,
+}
+
+def table(rng, directive, index, rows):
+  """Generate rst for a single config table or :cmdmenu: paragraph.
+
+  Args:
+    rng: random.Random instance.
+    directive: String directive name from DIRECTIVES.
+    index: Integer table index in the document, used for titles.
+    rows: Integer number of rows to generate.
+
+  Returns:
+    List of Strings containing rst lines.
+  """
+  if directive == 'cmdmenu':
+    return ['Open :cmdmenu:`%s` and :cmdmenu:`&%s`.' % (
+        _path(rng, '-->'), _path(rng, '-->', 2)), '']
+
+  lines = ['.. %s:: %s table %d' % (directive, directive, index)]
+  if directive == 'regedit':
+    lines.append('  :path: HKEY_LOCAL_MACHINE\\SOFTWARE\\%s\\%s' % (
+        rng.choice(WORDS), rng.choice(WORDS)))
+  elif directive in ('gpo', 'gui'):
+    lines.append('  :path: %s' % _path(rng, '-->'))
+  for i in range(min(rows, MAX_ROWS[directive])):
+    lines.append('  :value%d: %s' % (i, ROWS[directive](rng, i)))
+  if rows > MAX_ROWS[directive]:
+    lines.append('  :values:')
+    for i in range(MAX_ROWS[directive], rows):
+      lines.append('    %s' % ROWS[directive](rng, i))
+  if directive == 'gpo':
+    lines.append('  :version: {PRO}, {ENTERPRISE}')
+  lines.append('  :update: 2021-01-01')
+  lines.append('  :ref: https://example.com/%d' % index)
+  if rng.random() < 0.5:
+    lines.append('  :open:')
+  lines.append('')
+  lines.append('  Table %d description with *inline* markup.' % index)
+  lines.append('')
+  return lines
+
+def generate(root, site, docs=10, tables=1, rows=5, directives=DIRECTIVES,
+             seed=0):
+  """Generate a sphinx project.
+
+  Args:
+    root: String directory to write the project to. Created if needed.
+    site: String directory containing the 'sphinx-configtable' package.
+    docs: Integer number of documents to generate. Default: 10.
+    tables: Integer number of tables per document. Default: 1.
+    rows: Integer number of rows per table. Default: 5.
+    directives: Iterable of directive names to use. Default: DIRECTIVES.
+    seed: Integer random seed. Default: 0.
+
+  Returns:
+    Dictionary containing the number of each directive generated.
+  """
+  rng = random.Random(seed)
+  directives = list(directives)
+  counts = dict.fromkeys(directives, 0)
+  os.makedirs(root, exist_ok=True)
+  with open(os.path.join(root, 'conf.py'), 'w') as f:
+    f.write(CONF % {'site': site})
+
+  names = ['doc%05d' % d for d in range(docs)]
+  with open(os.path.join(root, 'index.rst'), 'w') as f:
+    f.write('Benchmark\n=========\n\n.. toctree::\n  :maxdepth: 1\n\n')
+    f.writelines('  %s\n' % name for name in names)
+
+  for d, name in enumerate(names):
+    lines = [name, '=' * len(name), '']
+    for t in range(tables):
+      directive = directives[(d + t) % len(directives)]
+      counts[directive] += 1
+      lines.extend(table(rng, directive, t, rng.randint(1, rows)))
+    with open(os.path.join(root, '%s.rst' % name), 'w') as f:
+      f.write('\n'.join(lines))
+  return counts
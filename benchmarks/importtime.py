@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Import time budget check for the config table extension.
+#
+# Imports the extension with 'python -X importtime' after the modules sphinx
+# has already imported before loading extensions, and fails if the cumulative
+# import time of the extension (including any modules it imports) exceeds the
+# budget. Directive modules are imported on first use, so they should not
+# appear in the report.
+#
+# Exits with status 1 if the import time exceeds the budget and 2 if the
+# extension cannot be imported, so the check can run in CI.
+#
+# Usage:
+#   python benchmarks/importtime.py
+#   python benchmarks/importtime.py --budget 5 --repeat 10 --verbose
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = 'sphinx-configtable'
+
+# Modules imported by sphinx before extensions are set up, including builtin
+# extensions (see sphinx.application.builtin_extensions).
+PRELOAD = (
+  'sphinx.application',
+  'sphinx.util.docutils',
+  'sphinx.builders.html',
+  'sphinx.transforms.post_transforms',
+  'docutils.nodes',
+  'docutils.parsers.rst',
+)
+
+# Measured import time in milliseconds: median of 9 runs of the fastest of 20
+# imports, Python 3.11.7, sphinx 4.5.0, docutils 0.17.1 (2026-10-17).
+BASELINE = 4.25
+
+CODE = """\
+import sys
+sys.path.insert(0, %(site)r)
+%(preload)s
+__import__(%(package)r)
+"""
+
+def measure(site):
+  """Import the extension once with -X importtime.
+
+  Args:
+    site: String directory containing the 'sphinx-configtable' package.
+
+  Returns:
+    Tuple of (Integer cumulative import time in microseconds, List of
+    (Integer self microseconds, String module) Tuples imported by the
+    extension).
+
+  Raises:
+    RuntimeError: if the import fails.
+  """
+  code = CODE % {
+    'site': site,
+    'preload': '\n'.join('import %s' % m for m in PRELOAD),
+    'package': PACKAGE,
+  }
+  proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                        stderr=subprocess.PIPE, universal_newlines=True)
+  if proc.returncode:
+    raise RuntimeError('import failed:\n%s' % proc.stderr)
+  # Modules imported by the extension are listed before it, indented.
+  modules = []
+  for line in proc.stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    own, cumulative, name = line[len('import time:'):].split('|')
+    if name.strip() == PACKAGE:
+      return int(cumulative), modules
+    if name.startswith('  '):
+      modules.append((int(own), name.strip()))
+    else:
+      modules = []
+  raise RuntimeError('%s not found in import time report' % PACKAGE)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--budget', type=float, default=5.0,
+                      help='Maximum cumulative import time in milliseconds. Default: 5.')
+  parser.add_argument('--repeat', type=int, default=20,
+                      help='Number of imports; the fastest is used. Default: 20.')
+  parser.add_argument('--verbose', action='store_true',
+                      help='List the slowest modules imported by the extension.')
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory(prefix='ct-importtime-') as tmp:
+    os.symlink(ROOT, os.path.join(tmp, PACKAGE))
+    try:
+      best, modules = min(measure(tmp) for _ in range(args.repeat))
+    except RuntimeError as e:
+      print(e)
+      return 2
+  print('%s import time: %.2fms (baseline %.2fms, budget %.2fms)' % (
+      PACKAGE, best / 1000, BASELINE, args.budget))
+  if args.verbose:
+    for own, name in sorted(modules, reverse=True)[:15]:
+      print('  %8.2fms %s' % (own / 1000, name))
+  if best / 1000 > args.budget:
+    print('import time budget exceeded')
+    return 1
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Parallel build scaling harness for config table extensions.
+#
+# Generates a single synthetic sphinx project (see corpus.py), builds it with
+# -j 1..N and checks that every build writes byte-identical output to the
+# -j 1 build. Reports wall time, speedup and parallel efficiency per job
+# count, optionally plotted to an image (requires matplotlib).
+#
+# Usage:
+#   Scale -j 1..8 on a large corpus:
+#     python benchmarks/parallel.py --docs 2000 --tables 10 --max-jobs 8
+#
+#   Check selected job counts, recording results and a speedup plot:
+#     python benchmarks/parallel.py --jobs 1,2,4,8,16,32 --output jobs.json \
+#         --plot speedup.png
+
+import argparse
+import filecmp
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import bench
+import corpus
+
+# Output files which legitimately differ between builds.
+IGNORED = ('.buildinfo',)
+
+def _files(path):
+  """Return the set of output files under path, relative to path."""
+  result = set()
+  for dirpath, _, filenames in os.walk(path):
+    for name in filenames:
+      if name not in IGNORED:
+        result.add(os.path.relpath(os.path.join(dirpath, name), path))
+  return result
+
+def differences(expected, actual):
+  """Compare two build output directories.
+
+  Args:
+    expected: String reference build output directory.
+    actual: String build output directory to check.
+
+  Returns:
+    Sorted List of Strings describing missing, extra and differing files.
+  """
+  expected_files = _files(expected)
+  actual_files = _files(actual)
+  result = ['missing %s' % f for f in expected_files - actual_files]
+  result.extend('extra %s' % f for f in actual_files - expected_files)
+  for f in expected_files & actual_files:
+    if not filecmp.cmp(os.path.join(expected, f), os.path.join(actual, f), shallow=False):
+      result.append('differs %s' % f)
+  return sorted(result)
+
+def run(tmp, jobs, builder, repeat):
+  """Build the project in tmp/src once per job count.
+
+  Returns:
+    List of result Dictionaries, one per job count, in order of jobs.
+  """
+  src = os.path.join(tmp, 'src')
+  reference = None
+  results = []
+  for j in jobs:
+    out = os.path.join(tmp, 'j%d' % j)
+    walls = []
+    rss = 0
+    for _ in range(repeat):
+      shutil.rmtree(out, ignore_errors=True)
+      wall, peak = bench.build(src, out, builder, j)
+      walls.append(wall)
+      rss = max(rss, peak)
+    output = os.path.join(out, builder)
+    if reference is None:
+      reference = output
+    results.append({
+      'jobs': j,
+      'wall': min(walls),
+      'rss_kib': rss,
+      'differences': differences(reference, output),
+    })
+  base = results[0]['wall'] * results[0]['jobs']
+  for result in results:
+    result['speedup'] = base / result['wall']
+    result['efficiency'] = result['speedup'] / result['jobs']
+  return results
+
+def plot(results, path):
+  """Plot speedup per job count against linear speedup.
+
+  Args:
+    results: List of result Dictionaries from run().
+    path: String image file to write.
+  """
+  try:
+    from matplotlib import pyplot
+  except ImportError:
+    raise SystemExit('--plot requires matplotlib')
+  jobs = [r['jobs'] for r in results]
+  figure, axes = pyplot.subplots()
+  axes.plot(jobs, jobs, linestyle='--', color='grey', label='linear')
+  axes.plot(jobs, [r['speedup'] for r in results], marker='o', label='measured')
+  axes.set_xlabel('jobs (-j)')
+  axes.set_ylabel('speedup over -j 1')
+  axes.legend()
+  figure.savefig(path)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Config table parallel build harness.')
+  parser.add_argument('--docs', type=int, default=500)
+  parser.add_argument('--tables', type=int, default=10)
+  parser.add_argument('--rows', type=int, default=20)
+  parser.add_argument('--directive', action='append', choices=corpus.DIRECTIVES,
+                      help='Directive to use, may be repeated. Default: all.')
+  parser.add_argument('--jobs', type=bench._ints,
+                      help='Comma separated job counts. Default: 1..--max-jobs.')
+  parser.add_argument('--max-jobs', type=int, default=os.cpu_count() or 1)
+  parser.add_argument('--builder', default='html')
+  parser.add_argument('--repeat', type=int, default=1)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--output', help='Write JSON results to this file.')
+  parser.add_argument('--plot', help='Plot speedup to this image file.')
+  parser.add_argument('--keep', help='Generate the project in this directory.')
+  args = parser.parse_args(argv)
+
+  jobs = args.jobs or list(range(1, args.max_jobs + 1))
+  if 1 not in jobs:
+    jobs.insert(0, 1)
+  jobs = sorted(set(jobs))
+  tmp = args.keep or tempfile.mkdtemp(prefix='ct-parallel-')
+  try:
+    src = os.path.join(tmp, 'src')
+    shutil.rmtree(src, ignore_errors=True)
+    corpus.generate(src, bench._site(tmp), args.docs, args.tables, args.rows,
+                    args.directive or corpus.DIRECTIVES, args.seed)
+    results = run(tmp, jobs, args.builder, args.repeat)
+  finally:
+    if not args.keep:
+      shutil.rmtree(tmp, ignore_errors=True)
+
+  print('%-6s %10s %12s %8s %10s  %s' % (
+      'jobs', 'wall (s)', 'rss (KiB)', 'speedup', 'efficiency', 'output'))
+  for result in results:
+    print('%-6d %10.2f %12d %8.2f %10.2f  %s' % (
+        result['jobs'], result['wall'], result['rss_kib'], result['speedup'],
+        result['efficiency'], 'DIFFERS' if result['differences'] else 'identical'))
+  for result in results:
+    for difference in result['differences']:
+      print('-j %d: %s' % (result['jobs'], difference))
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(results, f, indent=2)
+  if args.plot:
+    plot(results, args.plot)
+  return 1 if any(r['differences'] for r in results) else 0
+
+if __name__ == '__main__':
+  sys.exit(main())
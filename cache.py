@@ -0,0 +1,126 @@
+# Build-wide cache of rendered config tables.
+#
+# Identical config tables (same directive, arguments, options and resolved
+# separators) are rendered once per build; later uses receive a deep copy of
+# the rendered nodes and share the indexed rows (see index.py) and used badge
+# tokens. Directive content is always parsed for the current document and is
+# not part of the cache.
+#
+# Cache hits and misses are logged at the end of the build in verbose mode
+# (-v). The cache is per process: with parallel reads (-j) the counters only
+# cover documents read in the main process.
+
+from docutils import nodes
+from . import elements
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+# Node types which render identically in any document.
+CACHEABLE = (
+  elements.ct_data,
+  elements.ct_summary,
+  elements.ct_content,
+  elements.ct_cell,
+  nodes.container,
+  nodes.paragraph,
+  nodes.inline,
+  nodes.emphasis,
+  nodes.strong,
+  nodes.literal,
+  nodes.Text,
+)
+
+def _cacheable(node):
+  """Determine if a node may be shared between documents.
+
+  Args:
+    node: nodes.Node to check.
+
+  Returns:
+    Boolean True if the node does not depend on the document it was rendered
+    in (e.g. no cross references, targets or system messages).
+  """
+  if isinstance(node, nodes.reference):
+    return 'refuri' in node
+  return isinstance(node, CACHEABLE)
+
+
+class TableCache(object):
+  """Cache of rendered config table nodes.
+
+  Attributes:
+    hits: Integer number of tables returned from the cache.
+    misses: Integer number of tables which were rendered.
+  """
+
+  def __init__(self):
+    self.clear()
+
+  def clear(self):
+    """Remove all cached tables and reset counters."""
+    self._tables = {}
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, directive):
+    """Generate cache key for a config table directive.
+
+    Args:
+      directive: ct.AbstractConfigTable directive to generate key for.
+
+    Returns:
+      Tuple containing the directive name, arguments, options, resolved file
+      paths and resolved separator configuration.
+    """
+    # File options are keyed on the resolved path, so identical tables in
+    # different directories are shared.
+    return (directive.name,
+            tuple(directive.arguments),
+            tuple(sorted(x for x in directive.options.items()
+                         if x[0] not in directive.path_options)),
+            tuple(sorted(directive.paths.items())),
+            directive.sep,
+            directive.rep)
+
+  def get(self, key):
+    """Return a copy of the cached table for key.
+
+    Args:
+      key: Tuple cache key from key().
+
+    Returns:
+      Tuple of (nodes.container deep copy of the cached table, Tuple of index
+      row groups, frozenset of badge tokens) or None.
+    """
+    try:
+      table, groups, tokens = self._tables[key]
+    except KeyError:
+      self.misses += 1
+      return None
+    self.hits += 1
+    return table.deepcopy(), groups, tokens
+
+  def set(self, key, table, groups=(), tokens=frozenset()):
+    """Cache a rendered table, if it can be shared between documents.
+
+    Args:
+      key: Tuple cache key from key().
+      table: nodes.container rendered table, without directive content.
+      groups: Tuple of immutable index row groups, see index.Record.
+      tokens: frozenset of String badge tokens used by the table.
+    """
+    if all(_cacheable(node) for node in table.traverse()):
+      self._tables[key] = (table.deepcopy(), groups, tokens)
+
+
+tables = TableCache()
+
+def reset(app):
+  """Clear the table cache at the start of a build."""
+  tables.clear()
+
+def report(app, exception):
+  """Log main process table cache hits and misses at the end of a build."""
+  logger.verbose('config table cache: %d hits, %d misses (main process only)',
+                 tables.hits, tables.misses)
@@ -1,12 +1,49 @@
 # Default configuration values for config table sphinx extensions.
+#
+# Separator, replace, use space and delimiter settings are resolved once per
+# build at config-inited for every config table and role type (see TYPES), and
+# read by each directive and role through settings().
 
 import re
+import collections
 
 DEFAULT_SEPARATOR = r'\N{TRIANULAR_BULLET}'
 DEFAULT_REPLACE = '-->'
 DEFAULT_DELIM = ','
 AMP_RE = re.compile(r'(?<!&)&(?![&\s])')
 
+# Config table and role types: type specific config values. Type specific
+# values (ct_{type}_{value}) take precedence over ct_separator and
+# ct_separator_replace when not the default.
+TYPES = {
+  'cmdmenu': ('separator', 'separator_replace', 'replace_use_space'),
+  'files': (),
+  'gpo': ('separator', 'separator_replace'),
+  'gui': ('separator', 'separator_replace'),
+  'ports': (),
+  'regedit': (),
+}
+
+# Type specific config value: default.
+DEFAULTS = {
+  'separator': DEFAULT_SEPARATOR,
+  'separator_replace': DEFAULT_REPLACE,
+  'replace_use_space': True,
+}
+
+Settings = collections.namedtuple('Settings', ('sep', 'rep', 'space', 'delim'))
+Settings.__doc__ = """Resolved settings for a config table or role type.
+
+  Attributes:
+    sep: Unicode separator.
+    rep: String separator replacement.
+    space: Boolean True to insert a single space around separators.
+    delim: String default delimeter.
+"""
+
+# Resolved settings, type: Settings. Set at config-inited.
+_settings = {}
+
 def _determine_preference(default, custom=None, config=None):
   """Determine the preference to use for given inputs.
 
@@ -56,3 +93,55 @@ def get_rep(custom=None, config=None):
       * DEFAULT_REPLACE used if all defaults or none defined.
   """
   return _determine_preference(DEFAULT_REPLACE, custom, config)
+
+def resolve(config):
+  """Resolve settings for every type in TYPES.
+
+  Args:
+    config: sphinx Config.
+
+  Returns:
+    Dictionary of String type: Settings.
+  """
+  result = {}
+  for name, values in TYPES.items():
+    custom = {v: getattr(config, 'ct_%s_%s' % (name, v)) for v in values}
+    result[name] = Settings(
+        get_sep(custom.get('separator'), config.ct_separator),
+        get_rep(custom.get('separator_replace'), config.ct_separator_replace),
+        custom.get('replace_use_space', DEFAULTS['replace_use_space']),
+        DEFAULT_DELIM)
+  result[None] = Settings(get_sep(None, config.ct_separator),
+                          get_rep(None, config.ct_separator_replace),
+                          DEFAULTS['replace_use_space'],
+                          DEFAULT_DELIM)
+  return result
+
+def settings(name):
+  """Return resolved Settings for a config table or role type.
+
+  Args:
+    name: String type from TYPES, e.g. 'gpo'. Other types (e.g. ct_tables)
+        use the global settings.
+  """
+  try:
+    return _settings[name]
+  except KeyError:
+    return _settings[None]
+
+def config_inited(app, config):
+  _settings.clear()
+  _settings.update(resolve(config))
+
+def setup(app):
+  """Register separator config values for all config tables and roles.
+
+  Registered here rather than by each directive module, so directive modules
+  are only imported on first use (see lazy.py).
+  """
+  app.add_config_value('ct_separator', DEFAULT_SEPARATOR, '')
+  app.add_config_value('ct_separator_replace', DEFAULT_REPLACE, '')
+  for name, values in TYPES.items():
+    for value in values:
+      app.add_config_value('ct_%s_%s' % (name, value), DEFAULTS[value], '')
+  app.connect('config-inited', config_inited)
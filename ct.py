@@ -1,39 +1,97 @@
 # Abstract base config table template class. Do not use directly.
 
+import re
 import inspect
+from . import cache
 from . import config
+from . import elements
+from . import factory
+from . import index
+from . import model
+from . import sources
+from . import timing
 from .v2 import badges
 from docutils import nodes
-from docutils.statemachine import ViewList
-from docutils.parsers.rst import directives
-from sphinx.util.nodes import nested_parse_with_titles
 from docutils.parsers.rst.directives.tables import Table
 
+# Characters which may start inline markup (roles, emphasis, references,
+# standalone hyperlinks or escapes). Text without these is rendered as is.
+INLINE_RE = re.compile(r'[*`_|:@\\]')
+
+# Cells stored as text are rendered at write time, after read time transforms,
+# so cells with inline markup or text changed by smart quotes (quotes, dashes
+# and ellipses) are parsed when read. Backslashes are rendered literally.
+PARSE_RE = re.compile(r'[*`_|:@\'"]|--|\.\.\.')
+
+# Fixed row options, :value0: .. :value{N}:.
+VALUE_RE = re.compile(r'value\d+$')
+
 class AbstractConfigTable(Table):
   """Abstract config table template class.
 
-  Renders pseudo-tables using sphinx_panels library. Table base class is needed
-  only for the make_title() functionality.
+  Renders a dropdown containing the directive content, a grid of rows and a
+  badge footer, stored as a compact elements.ct_data node (see elements.py).
+  Rows are stored directly from the sanitized options, without generating and
+  re-parsing rst. Table base class is needed only for the make_title()
+  functionality.
+
+  Subclasses implement _render(), which is only called if an identical table
+  has not already been rendered in this build (see cache.TableCache).
 
   Attributes:
-    delim: String delimeter to use. Default: config.DEFAULT_DELIM.
+    settings: config.Settings resolved for the config table type.
+    delim: String delimeter to use. Default: settings.delim.
     c: String instantiated class name.
     title: node.title object containing the directive title.
-    _rst: ViewList object containing generated rst. Must be cleared before each
-        render operation.
-    sep: Unicode menu separator to use.
-    rep: String separator replacement to use.
+    sep: Unicode menu separator to use. Default: settings.sep.
+    rep: String separator replacement to use. Default: settings.rep.
+    source: String absolute path of the :source: file or None.
+    paths: Dictionary of option: String absolute path for each file option in
+        path_options.
+    _dropdown: elements.ct_data containing the rendered table.
+    _rows: List of (String row kind, Tuple of cells) stored rows.
+    _footer: List of (String kind, value) stored update, version and
+        reference badges.
+    _fragments: Integer number of parsed ct_cell cells in _dropdown.
+    _groups: List of (String path or None, Tuple of row Tuples) rendered rows
+        for the project index, see _add_group().
+    _tokens: Set of String badge tokens used by the rendered table.
   """
+  # Options containing file paths, relative to the document. Files are noted
+  # as document dependencies and tables are cached on the resolved paths.
+  path_options = ('source',)
+  # Dropdown label used with :generic:.
+  label = None
+  # Column widths in twelfths (or None), see _add_grid().
+  widths = ()
+  # True to give rendered tables a unique id, recorded in the project index so
+  # other pages may link to them (see _add_target()).
+  anchor = False
 
   def __init__(self, *args, **kwargs):
     """Setup default abstract class attributes."""
     super().__init__(*args, **kwargs)
-    self._rst = ViewList()
+    self._dropdown = None
+    self._rows = None
+    self._footer = None
+    self._fragments = 0
+    self._timer = timing.NULL_TIMER
+    self._groups = []
+    self._tokens = set()
+    self.paths = {}
+    self._relpaths = []
+    env = self.state.document.settings.env
+    for option in self.path_options:
+      if option in self.options:
+        relpath, self.paths[option] = env.relfn2path(self.options[option], env.docname)
+        self._relpaths.append(relpath)
+    self.source = self.paths.get('source')
     self.title, _ = self.make_title()
     self.c = inspect.currentframe().f_locals['self'].__class__.__name__
-    self.delim = config.DEFAULT_DELIM
-    self.sep = self.state.document.settings.env.config.ct_separator
-    self.rep = self.state.document.settings.env.config.ct_separator_replace
+    self.settings = config.settings(self.c.lower())
+    self.delim = self.settings.delim
+    self.sep = self.settings.sep
+    self.rep = self.settings.rep
 
   def _set_delim(self):
     """Sets delimeter based on :delim:, stripping whitespace."""
@@ -43,7 +101,8 @@ class AbstractConfigTable(Table):
   def _parse_list(self, key, split=None):
     """Parse directive options on key and return sanitized python list.
 
-    Uses self.delim to split; automatically converts badges.
+    Uses self.delim to split. Badges are converted when rendered, see
+    _inline().
 
     Args:
       key: String key to use for self.options dictionary.
@@ -55,7 +114,8 @@ class AbstractConfigTable(Table):
     """
     if not split:
       split = self.delim
-    return [self._convert_to_badge(x.strip()) for x in self.options[key].split(split)]
+    with self._timer.phase('sanitize'):
+      return [x.strip() for x in self.options[key].split(split)]
 
   def _add_nav_to_path(self):
     """Combines nav and path options to path, if existing."""
@@ -79,27 +139,68 @@ class AbstractConfigTable(Table):
       return ''.join(self._parse_list('path', sep))
     return None
 
-  def _sanitize_data(self, limit=10):
-    """Sanitize directive user input data for :value{0..9}:.
+  def _sanitize_data(self):
+    """Sanitize directive user input data for :value{N}: and :values:.
+
+    Converts each to List using delim, stripping whitespace. :value{N}: rows
+    are returned first, in order, followed by :values: rows and :source: file
+    rows. There is no limit on the number of :values: or :source: rows.
+
+    Returns:
+      List of row Tuples in order of :value{N}: directives, :values: lines and
+      :source: rows, containing processed value options (see model.py). or
+      [].
+    """
+    self._set_delim()
+    values = sorted((int(k[5:]), k) for k in self.options if VALUE_RE.match(k))
+    data = [self._parse_row(key) for _, key in values]
+    if 'values' in self.options:
+      data.extend(self._parse_rows('values'))
+    if self.source:
+      data.extend(self._sanitize_source())
+    return data
+
+  def _sanitize_source(self):
+    """Load rows from the :source: file.
+
+    Files are parsed once per build, see sources.SourceCache.
+
+    Returns:
+      List of row Tuples containing each row from the source file.
+    """
+    try:
+      with self._timer.phase('sanitize'):
+        return sources.files.rows(self.source)
+    except sources.SourceError as e:
+      raise self.error(str(e))
+
+  def _parse_row(self, key):
+    """Parse directive option on key to a sanitized row.
+
+    Args:
+      key: String key to use for self.options dictionary.
+
+    Returns:
+      Tuple containing each cell with whitespace stripped, see model.row.
+    """
+    with self._timer.phase('sanitize'):
+      return model.split(self.options[key], self.delim)
+
+  def _parse_rows(self, key):
+    """Parse multi-line directive option on key to sanitized rows.
 
-    Converts each to List using delim, stripping whitespace.
+    Each non-blank line is a row, split on self.delim, in a single pass.
 
     Args:
-      limit: Integer number of value directives. Default: 10.
+      key: String key to use for self.options dictionary.
 
     Returns:
-      List of Lists in order of :value{0..9}: directives, containing processed
-      value options. or None.
+      List of Tuples containing each row with whitespace stripped.
     """
-    self._set_delim()
-    data = []
-    for x in range(0,limit):
-      value = 'value%s' % x
-      if value in self.options:
-        data.append(self._parse_list(value))
-    if data:
-      return data
-    return []
+    split = self.delim
+    with self._timer.phase('sanitize'):
+      return [model.split(line, split)
+              for line in self.options[key].splitlines() if line.strip()]
 
   def _sanitize_update(self):
     """Strips whitespace and combines to single string if needed.
@@ -123,40 +224,333 @@ class AbstractConfigTable(Table):
       return self._parse_list('ref')
     return None
 
-  def gen_label(self, text, space=True):
-    """Generate primative text label from menuselection with badge replacement.
+  def gen_label(self, text, space=None):
+    """Generate primative text label from menuselection.
 
     Args:
       text: Unicode text to generate.
       space: Boolean True to insert a single space before and after the unicode
           separator, trimming existing whitespace as needed. False: leaves
-          whitespace as is. Default: True.
+          whitespace as is. Default: self.settings.space.
 
     Returns:
       String containing processed label with custom separators.
     """
-    if space:
-      sep = ' %s ' % self.sep
-      menu_text = sep.join(map(lambda x: self._convert_to_badge(x.strip()), text.split(self.rep)))
-    else:
-      menu_text = text.replace(self.rep, self.sep)
-    return menu_text
+    if space is None:
+      space = self.settings.space
+    with self._timer.phase('sanitize'):
+      if space:
+        sep = ' %s ' % self.sep
+        menu_text = sep.join(map(lambda x: x.strip(), text.split(self.rep)))
+      else:
+        menu_text = text.replace(self.rep, self.sep)
+      return menu_text
+
+  def _new_dropdown(self, label, generic=False):
+    """Create the dropdown node for the table.
+
+    Args:
+      label: String dropdown label.
+      generic: Boolean True to render a light-grey generic dropdown.
+    """
+    self._dropdown = elements.ct_data('', open='open' in self.options, generic=generic,
+                                      widths=(), aligns=(), grid_classes=(),
+                                      rows=None, footer=None)
+    self._dropdown += elements.ct_summary(label, label)
 
-  def _convert_to_badge(self, text):
-    """Convert raw text to badge.
+  def _new_grid(self, widths, aligns=None, classes=()):
+    """Create the content and row grid for the table.
 
-    Text is matched if contained within brackets {TEXT}.
+    The content is left empty for the directive content. See _add_content().
 
     Args:
-      text: String text to potentially convert.
+      widths: Tuple of Integer column widths in twelfths (or None).
+      aligns: Tuple of String column text alignments (or None). Default: None.
+      classes: Tuple of String grid classes, e.g. 'ct-striped'. Default: ().
+    """
+    self._dropdown += elements.ct_content()
+    self._dropdown['widths'] = tuple(widths)
+    self._dropdown['aligns'] = tuple(aligns or [None] * len(widths))
+    self._dropdown['grid_classes'] = tuple(classes)
+    self._dropdown['rows'] = self._rows = []
+
+  def _add_content(self, table):
+    """Parse directive content into a rendered table.
+
+    Args:
+      table: elements.ct_data rendered table from _render().
+    """
+    content = table.next_node(elements.ct_content)
+    self.state.nested_parse(self.content, self.content_offset, content)
+
+  def _cell(self, text):
+    """Store a table cell.
 
-    Requires:
-      self.text_badges: Dictionary containing text:rst mappings.
+    Text and badges are stored as is and rendered at write time (see
+    elements.expand()); only text containing inline rst is parsed.
+
+    Args:
+      text: String inline rst to render in the cell, or None (empty).
 
     Returns:
-      String raw text or rst formatted badge.
+      String cell text, or Integer index of the elements.ct_cell containing
+      the rendered text.
     """
-    try:
-      return badges.badges[text]
-    except KeyError:
+    if not text:
+      return ''
+    if not PARSE_RE.search(badges.strip(text, self._tokens)):
       return text
+    cell = elements.ct_cell(text)
+    text_nodes, messages = self._inline(text)
+    cell.extend(text_nodes)
+    self._dropdown += cell
+    self._dropdown += messages
+    self._fragments += 1
+    return self._fragments - 1
+
+  def _add_row(self, cells, kind='row'):
+    """Add a row to the grid.
+
+    Short rows are padded with empty cells; rows longer than the number of
+    columns are continued on the following rows. Rows of plain text cells are
+    stored as the row Tuple itself, without a copy.
+
+    Args:
+      cells: Tuple of String inline rst to render in each cell.
+      kind: String row kind, 'header' or 'row'. Default: 'row'.
+    """
+    columns = len(self._dropdown['widths'])
+    cells = tuple(cells)
+    for start in range(0, max(len(cells), 1), columns):
+      chunk = model.pad(cells[start:start + columns], columns)
+      stored = tuple(map(self._cell, chunk))
+      self._rows.append((kind, chunk if stored == chunk else stored))
+
+  def _add_value_row(self, data):
+    """Add a row for :value{N}:, :values: or :source: rows.
+
+    Args:
+      data: Tuple of strings to render to row.
+    """
+    self._add_row(data)
+
+  def _add_path(self, path):
+    """Add a full width row for :path:.
+
+    Args:
+      path: String to render to row. Nothing is added if empty.
+    """
+    if path:
+      self._rows.append(('path', (self._cell(path),)))
+
+  def _inline(self, text):
+    """Render inline rst text to nodes, converting badges.
+
+    Every badge token contained within brackets {TEXT} is replaced with badge
+    nodes, e.g. 'Set {ON} for {HTTPS}'. Backslashes are rendered literally
+    (e.g. registry paths). Text without inline markup is not parsed.
+
+    Args:
+      text: String inline rst to render.
+
+    Returns:
+      Tuple of (List of nodes.Node, List of nodes.system_message) containing
+      rendered text and any parsing messages.
+    """
+    messages = []
+
+    def render(text):
+      if not INLINE_RE.search(text):
+        return [nodes.Text(text)]
+      text_nodes, text_messages = self.state.inline_text(
+          text.replace('\\', '\\\\'), self.lineno)
+      messages.extend(text_messages)
+      return text_nodes
+
+    return badges.text_nodes(text, render, self._tokens), messages
+
+  def _add_dropdown_header(self):
+    """Add the dropdown, labelled with the title or generic label."""
+    if 'generic' in self.options:
+      self._new_dropdown(self.label, generic=True)
+    else:
+      self._new_dropdown(self.title.astext())
+
+  def _add_grid(self):
+    self._new_grid(self.widths)
+
+  def _add_update(self, update):
+    """Add the footer for :update: directive.
+
+    Args:
+      update: String update time to render to row.
+    """
+    self._new_footer([('update', update)])
+
+  def _add_reference(self, ref):
+    """Add badge for :ref: directive.
+
+    Args:
+      ref: String reference to render to row.
+    """
+    self._footer.append(('ref', ref))
+
+  def _new_footer(self, items):
+    """Add the footer, containing update and badge rows.
+
+    Args:
+      items: List of (String kind, value) footer items, see elements.py.
+    """
+    self._dropdown['footer'] = self._footer = list(items)
+
+  def _add_footer(self, text):
+    """Add inline rst to the footer, separated by whitespace.
+
+    Args:
+      text: String inline rst to add to the footer.
+    """
+    self._footer.append(('text', self._cell(text)))
+
+  def _add_group(self, path, rows):
+    """Record rendered rows in the project index (see index.py).
+
+    Args:
+      path: String path the rows belong to (e.g. registry key) or None.
+      rows: List of row Tuples of Strings rendered rows, shared with the
+          index. Empty groups without a path are not recorded.
+    """
+    if rows or path is not None:
+      self._groups.append((path, tuple(map(tuple, rows))))
+
+  def _add_target(self, table):
+    """Add a unique id, based on the directive name and title, to a table.
+
+    Args:
+      table: elements.ct_data rendered table.
+
+    Returns:
+      String id added to the table, registered with the document (which
+      reports duplicate ids).
+    """
+    document = self.state.document
+    base = nodes.make_id('%s-%s' % (self.name, badges.plain(self.title.astext())))
+    target = base
+    count = 1
+    while target in document.ids:
+      count += 1
+      target = '%s-%d' % (base, count)
+    table['ids'].append(target)
+    return document.set_id(table)
+
+  def _render(self):
+    """Render the config table nodes, without directive content.
+
+    Rendered rows are recorded with _add_group().
+
+    Returns:
+      elements.ct_data containing the rendered table.
+    """
+    raise NotImplementedError
+
+  def _note_dependencies(self):
+    """Note files the table is generated from as document dependencies.
+
+    Called for every use, including tables returned from the cache.
+    """
+    for relpath in self._relpaths:
+      sources.note_source(self.state.document.settings.env, relpath)
+
+  def _run(self, timer):
+    """Render the config table, reusing identical tables from this build.
+
+    Directive content is parsed for the current document on every use.
+
+    Args:
+      timer: timing.Timer to record phase durations with.
+    """
+    self._timer = timer
+    self._note_dependencies()
+    key = cache.tables.key(self)
+    entry = cache.tables.get(key)
+    if entry is None:
+      with timer.phase('render'):
+        table = self._render()
+      groups = tuple(self._groups)
+      tokens = frozenset(self._tokens)
+      cache.tables.set(key, table, groups, tokens)
+    else:
+      table, groups, tokens = entry
+    env = self.state.document.settings.env
+    target = self._add_target(table) if self.anchor else None
+    index.note(env, index.Record(self.name, self.lineno, self.title.astext(), groups, target))
+    badges.note(env, tokens)
+    table.source, table.line = self.state_machine.get_source_and_line(self.lineno)
+    with timer.phase('parse'):
+      self._add_content(table)
+    return [table]
+
+  def run(self):
+    env = self.state.document.settings.env
+    profiler = timing.get()
+    if profiler:
+      return profiler.call(self.name, env.docname, self.lineno, self._run)
+    return self._run(timing.NULL_TIMER)
+
+
+class ColumnTable(AbstractConfigTable):
+  """Config table rendering rows of columns under a header row.
+
+  Subclasses set columns to a Tuple of factory.Column; rows are rendered by a
+  row renderer generated once per column layout (see factory.renderer).
+
+  Directives:
+    :value{0..20}: List of strings, one per column.
+    :values:       Rows, one per line. Unlimited rows.
+    :source:       CSV/TSV/JSON/YAML file of rows.
+    :ref:          List of reference URI's.
+    :update:       String datetime last time references/settings were checked.
+    :delim:        Custom delimeter to use instead of config.DEFAULT_DELIM.
+    :generic:      Use generic dropdown label, in light-grey.
+    :open:         Set to expand the dropdown by default.
+  """
+  required_arguments = 1
+  optional_arguments = 0
+  final_argument_whitespace = True
+  has_content = True
+  add_index = True
+  option_spec = factory.option_spec()
+  columns = ()
+
+  def _add_table_headers(self):
+    self._add_row(model.header(tuple(column.title for column in self.columns)),
+                  kind='header')
+
+  def _add_grid(self):
+    self._new_grid([factory.span(column.width) for column in self.columns],
+                   [column.align for column in self.columns],
+                   classes=('ct-striped',))
+
+  def _render(self):
+    """Generate rendered nodes.
+
+    Returns:
+      elements.ct_data containing the rendered table.
+    """
+    self._add_dropdown_header()
+    self._add_grid()
+    self._add_table_headers()
+    render_row = factory.renderer(self.columns)
+    add_row = self._add_row
+    data = self._sanitize_data()
+    self._add_group(None, data)
+    for row in data:
+      try:
+        render_row(add_row, row)
+      except ValueError as e:
+        raise self.error(str(e))
+    self._add_update(self._sanitize_update())
+    if 'ref' in self.options:
+      for r in self._sanitize_ref():
+        self._add_reference(r)
+
+    return self._dropdown
@@ -0,0 +1,439 @@
+# Config table document nodes and writers.
+#
+# Config tables are stored in the pickled doctree as a single compact ct_data
+# node holding the rows, footer and options as plain data, so doctree size and
+# unpickling cost follow the table data rather than its markup. Cells are kept
+# as text with badge tokens; only cells containing inline rst are stored as
+# parsed ct_cell fragments. ct_data nodes are expanded to presentation nodes at
+# write time (see ExpandTables).
+#
+# Each expanded config table is a single ct_table node. HTML builders render it as a
+# collapsible <details> element containing the directive content, one semantic
+# <table> of rows and a footer of badges, styled by static/ct.css. LaTeX
+# builders render a single longtable, with badges as colored boxes, using
+# static/ctconfigtable.sty. Other builders receive standard docutils nodes (see
+# ConvertTables).
+#
+# With ct_html_lazy, the body of closed tables is written as an inert
+# <template>, turned into DOM by static/ct.js when the table is first opened,
+# so hidden rows are not laid out at page load. Content of closed tables is
+# then not found by in-page search until opened, or shown without javascript.
+#
+# conf.py options:
+#   ct_html_lazy: Boolean True to hydrate closed config tables on first open.
+#       Default: False.
+#
+# Stored node structure:
+#   ct_data:      'open' and 'generic' Booleans, 'widths', 'aligns' and
+#                 'grid_classes' of the ct_grid, 'rows' List of (String row
+#                 kind, Tuple of cells) Tuples and 'footer' List of ('update',
+#                 String), ('ref', String URI) or ('text', cell) Tuples, or
+#                 None. Each cell is a String of text and badge tokens, or an
+#                 Integer index of a ct_cell child.
+#     ct_summary: Dropdown label.
+#     ct_content: Parsed directive content.
+#     ct_cell:    Cells containing inline rst, referenced by index.
+#
+# Node structure:
+#   ct_table:     'open' and 'generic' Booleans.
+#     ct_summary: Dropdown label.
+#     ct_content: Parsed directive content.
+#     ct_grid:    'widths', List of Integer column widths in twelfths (or
+#                 None), and 'aligns', List of String column text alignments
+#                 (or None).
+#       ct_row:   'kind': 'header', 'path' (a single cell spanning all columns)
+#                 or 'row'.
+#         ct_cell
+#     ct_footer:  Update, version and reference badges.
+
+import os
+from docutils import nodes
+from sphinx.transforms.post_transforms import SphinxPostTransform
+from sphinx.util.fileutil import copy_asset_file
+from .v2 import badges
+
+STYLESHEET = 'ct.css'
+SCRIPT = 'ct.js'
+LATEX_PACKAGE = 'ctconfigtable'
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Builder formats rendering config table nodes directly.
+NATIVE_FORMATS = {'html', 'latex'}
+
+# Converted table colspec width per twelfth of a column (e.g. characters in
+# text output).
+COLWIDTH = 6
+
+
+class ct_data(nodes.General, nodes.Element):
+  """Compact stored config table, see expand()."""
+
+
+class ct_table(nodes.General, nodes.Element):
+  """Config table dropdown."""
+
+
+class ct_summary(nodes.Part, nodes.TextElement):
+  """Config table dropdown label."""
+
+
+class ct_content(nodes.Part, nodes.Element):
+  """Config table directive content."""
+
+
+class ct_grid(nodes.Part, nodes.Element):
+  """Config table rows."""
+
+
+class ct_row(nodes.Part, nodes.Element):
+  """Config table row."""
+
+
+class ct_cell(nodes.Part, nodes.TextElement):
+  """Config table cell."""
+
+
+class ct_footer(nodes.Part, nodes.TextElement):
+  """Config table badge footer."""
+
+
+def visit_table_html(self, node):
+  classes = 'ct-table ct-generic' if node['generic'] else 'ct-table'
+  tag = self.starttag(node, 'details', CLASS=classes)
+  if node['open']:
+    tag = tag.replace('<details', '<details open', 1)
+  self.body.append(tag)
+
+def _lazy(self, node):
+  """Determine if the body of a ct_table is written as a <template>."""
+  return self.config.ct_html_lazy and not node['open']
+
+def depart_table_html(self, node):
+  if _lazy(self, node):
+    self.body.append('</template>\n')
+  self.body.append('</details>\n')
+
+def visit_summary_html(self, node):
+  self.body.append(self.starttag(node, 'summary', '', CLASS='ct-summary'))
+
+def depart_summary_html(self, node):
+  self.body.append('</summary>\n')
+  if _lazy(self, node.parent):
+    self.body.append('<template class="ct-body">\n')
+
+def visit_content_html(self, node):
+  if not node.children:
+    raise nodes.SkipNode
+  self.body.append(self.starttag(node, 'div', CLASS='ct-content'))
+
+def depart_content_html(self, node):
+  self.body.append('</div>\n')
+
+def visit_grid_html(self, node):
+  self.body.append(self.starttag(node, 'table', CLASS='ct-grid'))
+  if any(node['widths']):
+    self.body.append('<colgroup>%s</colgroup>\n' % ''.join(
+        '<col class="ct-w%d" />' % w if w else '<col />' for w in node['widths']))
+  self._ct_section = None
+
+def _section_html(self, section):
+  if self._ct_section != section:
+    if self._ct_section:
+      self.body.append('</%s>\n' % self._ct_section)
+    self.body.append('<%s>\n' % section)
+    self._ct_section = section
+
+def depart_grid_html(self, node):
+  if self._ct_section:
+    self.body.append('</%s>\n' % self._ct_section)
+  self.body.append('</table>\n')
+
+def visit_row_html(self, node):
+  _section_html(self, 'thead' if node['kind'] == 'header' else 'tbody')
+  self.body.append('<tr>')
+  self._ct_column = 0
+
+def depart_row_html(self, node):
+  self.body.append('</tr>\n')
+
+def visit_cell_html(self, node):
+  row = node.parent
+  aligns = row.parent['aligns']
+  align = aligns[self._ct_column] if self._ct_column < len(aligns) else None
+  self._ct_column += 1
+  if row['kind'] == 'header':
+    self.body.append('<th scope="col">')
+  elif row['kind'] == 'path':
+    self.body.append('<th class="ct-path" colspan="%d">' % len(row.parent['widths']))
+  elif align:
+    self.body.append('<td class="ct-%s">' % align)
+  else:
+    self.body.append('<td>')
+
+def depart_cell_html(self, node):
+  self.body.append('</td>' if node.parent['kind'] == 'row' else '</th>')
+
+def visit_footer_html(self, node):
+  self.body.append(self.starttag(node, 'p', '', CLASS='ct-footer'))
+
+def depart_footer_html(self, node):
+  self.body.append('</p>\n')
+
+HTML_VISITORS = {
+  ct_table: (visit_table_html, depart_table_html),
+  ct_summary: (visit_summary_html, depart_summary_html),
+  ct_content: (visit_content_html, depart_content_html),
+  ct_grid: (visit_grid_html, depart_grid_html),
+  ct_row: (visit_row_html, depart_row_html),
+  ct_cell: (visit_cell_html, depart_cell_html),
+  ct_footer: (visit_footer_html, depart_footer_html),
+}
+
+# LaTeX column alignment, by ct_grid align.
+LATEX_ALIGN = {
+  None: r'\raggedright',
+  'right': r'\raggedleft',
+  'center': r'\centering',
+}
+
+def visit_table_latex(self, node):
+  self.body.append('\n\\begin{ctconfigtable}\n')
+  if node['ids']:
+    self.body.append(self.hypertarget_to(node, anchor=True) + '\n')
+
+def depart_table_latex(self, node):
+  self.body.append('\\end{ctconfigtable}\n')
+
+def visit_summary_latex(self, node):
+  self.body.append(r'\ctsummary{')
+
+def depart_summary_latex(self, node):
+  self.body.append('}\n')
+
+def visit_content_latex(self, node):
+  pass
+
+def depart_content_latex(self, node):
+  pass
+
+def _latex_widths(widths):
+  """Fill in unknown column widths (None) with an equal share."""
+  unknown = widths.count(None)
+  if unknown:
+    share = max(12 - sum(w for w in widths if w), unknown) / unknown
+    return [w or share for w in widths]
+  return widths
+
+def visit_grid_latex(self, node):
+  if not node.children:
+    raise nodes.SkipNode
+  total = sum(_latex_widths(node['widths']))
+  spec = ''.join(
+      r'>{%s\arraybackslash}p{\dimexpr %.4f\linewidth-2\tabcolsep\relax}'
+      % (LATEX_ALIGN.get(align, LATEX_ALIGN[None]), width / total)
+      for width, align in zip(_latex_widths(node['widths']), node['aligns']))
+  self.body.append('\\begin{longtable}{%s}\n\\hline\n' % spec)
+
+def depart_grid_latex(self, node):
+  self.body.append('\\hline\n\\end{longtable}\n')
+
+def visit_row_latex(self, node):
+  self._ct_column = 0
+
+def depart_row_latex(self, node):
+  self.body.append(' \\\\\n')
+  following = node.next_node(descend=False, siblings=True)
+  if node['kind'] == 'header' and (following is None or following['kind'] != 'header'):
+    self.body.append('\\hline\n\\endhead\n')
+
+def visit_cell_latex(self, node):
+  row = node.parent
+  if self._ct_column:
+    self.body.append(' & ')
+  self._ct_column += 1
+  if row['kind'] == 'header':
+    self.body.append(r'\cthead{')
+  elif row['kind'] == 'path':
+    self.body.append(r'\ctpath{%d}{' % len(row.parent['widths']))
+  else:
+    self.body.append('{')
+
+def depart_cell_latex(self, node):
+  self.body.append('}')
+
+def visit_footer_latex(self, node):
+  self.body.append(r'\ctfooter{')
+
+def depart_footer_latex(self, node):
+  self.body.append('}\n')
+
+LATEX_VISITORS = {
+  ct_table: (visit_table_latex, depart_table_latex),
+  ct_summary: (visit_summary_latex, depart_summary_latex),
+  ct_content: (visit_content_latex, depart_content_latex),
+  ct_grid: (visit_grid_latex, depart_grid_latex),
+  ct_row: (visit_row_latex, depart_row_latex),
+  ct_cell: (visit_cell_latex, depart_cell_latex),
+  ct_footer: (visit_footer_latex, depart_footer_latex),
+}
+
+def _expand_cell(value, fragments):
+  """Expand a stored cell to a ct_cell.
+
+  Args:
+    value: String text with badge tokens, or Integer index into fragments.
+    fragments: List of ct_cell parsed cells of the ct_data node.
+
+  Returns:
+    ct_cell containing the rendered cell.
+  """
+  if isinstance(value, int):
+    return fragments[value]
+  cell = ct_cell(value)
+  if value:
+    cell.extend(badges.text_nodes(value))
+  return cell
+
+def expand(node):
+  """Expand a ct_data node to presentation nodes.
+
+  Args:
+    node: ct_data to expand.
+
+  Returns:
+    ct_table containing the label, content, grid and footer.
+  """
+  table = ct_table('', open=node['open'], generic=node['generic'], ids=node['ids'],
+                   classes=node['classes'])
+  table.source, table.line = node.source, node.line
+  fragments = []
+  for child in node.children:
+    if isinstance(child, ct_cell):
+      fragments.append(child)
+    else:
+      table += child
+  if node['rows'] is not None:
+    grid = ct_grid(widths=list(node['widths']), aligns=list(node['aligns']),
+                   classes=list(node['grid_classes']))
+    for kind, cells in node['rows']:
+      row = ct_row(kind=kind)
+      row.extend(_expand_cell(value, fragments) for value in cells)
+      grid += row
+    table.insert(table.index(table.next_node(ct_content)) + 1, grid)
+  if node['footer'] is not None:
+    footer = ct_footer()
+    for kind, value in node['footer']:
+      if footer.children:
+        footer += nodes.Text('\n')
+      if kind == 'update':
+        footer += badges.update_node(value)
+      elif kind == 'ref':
+        footer += badges.ref_node(value)
+      else:
+        footer.extend(_expand_cell(value, fragments).children)
+    table += footer
+  return table
+
+
+class ExpandTables(SphinxPostTransform):
+  """Expand stored config tables to presentation nodes at write time."""
+  default_priority = 100
+
+  def run(self, **kwargs):
+    for node in list(self.document.traverse(ct_data)):
+      node.replace_self(expand(node))
+
+def _convert_grid(grid):
+  """Convert a ct_grid to a docutils table.
+
+  Returns:
+    nodes.table or None if the grid has no rows.
+  """
+  columns = len(grid['widths'])
+  thead = nodes.thead()
+  tbody = nodes.tbody()
+  for row in grid.children:
+    table_row = nodes.row()
+    for cell in row.children:
+      entry = nodes.entry()
+      if row['kind'] == 'path':
+        entry['morecols'] = columns - 1
+      entry += nodes.paragraph('', '', *cell.children)
+      table_row += entry
+    if row['kind'] == 'header':
+      thead += table_row
+    else:
+      tbody += table_row
+  if not tbody.children:
+    return None
+  tgroup = nodes.tgroup(cols=columns)
+  for width in grid['widths']:
+    tgroup += nodes.colspec(colwidth=(width or 2) * COLWIDTH)
+  if thead.children:
+    tgroup += thead
+  tgroup += tbody
+  return nodes.table('', tgroup, classes=['ct-grid'])
+
+def convert(node):
+  """Convert a ct_table to standard docutils nodes.
+
+  Args:
+    node: ct_table to convert.
+
+  Returns:
+    nodes.container containing the label, content, table and footer.
+  """
+  result = nodes.container(ids=node['ids'], classes=['ct-table'] + node['classes'])
+  for child in node.children:
+    if isinstance(child, ct_summary):
+      result += nodes.paragraph('', '', nodes.strong('', '', *child.children))
+    elif isinstance(child, ct_content):
+      result.extend(child.children)
+    elif isinstance(child, ct_grid):
+      table = _convert_grid(child)
+      if table is not None:
+        result += table
+    elif isinstance(child, ct_footer):
+      result += nodes.paragraph('', '', *child.children)
+    else:
+      result += child
+  return result
+
+
+class ConvertTables(SphinxPostTransform):
+  """Convert config tables to standard docutils nodes for other builders."""
+  default_priority = 200
+
+  def is_supported(self):
+    return self.app.builder.format not in NATIVE_FORMATS
+
+  def run(self, **kwargs):
+    for node in list(self.document.traverse(ct_table)):
+      node.replace_self(convert(node))
+
+def config_inited(app, config):
+  if config.ct_html_lazy:
+    app.add_js_file(SCRIPT)
+
+def build_finished(app, exception):
+  if exception is not None:
+    return
+  if app.builder.format == 'html':
+    static = os.path.join(app.outdir, '_static')
+    copy_asset_file(os.path.join(STATIC_DIR, STYLESHEET), static)
+    if app.config.ct_html_lazy:
+      copy_asset_file(os.path.join(STATIC_DIR, SCRIPT), static)
+  elif app.builder.format == 'latex':
+    copy_asset_file(os.path.join(STATIC_DIR, LATEX_PACKAGE + '.sty'), app.outdir)
+
+def setup(app):
+  app.add_config_value('ct_html_lazy', False, 'html')
+  app.add_node(ct_data)
+  for node, html in HTML_VISITORS.items():
+    app.add_node(node, html=html, latex=LATEX_VISITORS[node])
+  app.add_post_transform(ExpandTables)
+  app.add_post_transform(ConvertTables)
+  app.add_css_file(STYLESHEET)
+  app.add_latex_package(LATEX_PACKAGE)
+  app.connect('config-inited', config_inited)
+  app.connect('build-finished', build_finished)
@@ -0,0 +1,102 @@
+# Machine readable export of config table rows.
+#
+# At build-finished every row in the project index (see index.py) is written
+# to the output directory, with badge tokens reduced to their plain token
+# values (e.g. '{TCP}' -> 'TCP'):
+#   ct_export/<docname>.ndjson: One JSON object per row, streamed to disk:
+#       {"docname", "line", "directive", "title", "path", "row"}.
+#   ct_export/index.json: Dictionary of docname: {"shard", "rows"} for every
+#       document containing config tables.
+#
+# Shards are only rewritten for documents read (or removed) in this build, or
+# if the shard is missing.
+#
+# conf.py options:
+#   ct_export: Boolean True to write the export. Default: False.
+
+import os
+import json
+from sphinx.util import logging
+from . import index
+from .v2 import badges
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = 'ct_export'
+MANIFEST = 'index.json'
+VERSION = 1
+
+# Documents read or removed in this build.
+_changed = set()
+
+def builder_inited(app):
+  _changed.clear()
+
+def env_purge_doc(app, env, docname):
+  # Purged before every (re)read and for removed documents.
+  _changed.add(docname)
+
+def _write_shard(path, docname, records):
+  """Stream rows for a document to an NDJSON shard.
+
+  Args:
+    path: String shard path.
+    docname: String document name.
+    records: List of index.Record for the document.
+
+  Returns:
+    Integer number of rows written.
+  """
+  count = 0
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, 'w', encoding='utf-8') as f:
+    for record in records:
+      for group_path, rows in record.groups:
+        for row in rows:
+          f.write(json.dumps({
+            'docname': docname,
+            'line': record.line,
+            'directive': record.directive,
+            'title': badges.plain(record.title),
+            'path': group_path and badges.plain(group_path),
+            'row': [badges.plain(cell) for cell in row],
+          }, ensure_ascii=False))
+          f.write('\n')
+          count += 1
+  return count
+
+def build_finished(app, exception):
+  if exception or not app.config.ct_export:
+    return
+  env = app.env
+  root = os.path.join(app.outdir, EXPORT_DIR)
+  docnames = sorted({docname for docname, _ in index.records(env)})
+  written = 0
+  for docname in _changed.difference(docnames):
+    try:
+      os.remove(os.path.join(root, docname + '.ndjson'))
+    except FileNotFoundError:
+      pass
+  manifest = {}
+  for docname in docnames:
+    shard = docname + '.ndjson'
+    path = os.path.join(root, shard)
+    records = index.document(env, docname)
+    if docname in _changed or not os.path.exists(path):
+      written += 1
+      rows = _write_shard(path, docname, records)
+    else:
+      rows = sum(len(g[1]) for r in records for g in r.groups)
+    manifest[docname] = {'shard': shard, 'rows': rows}
+  os.makedirs(root, exist_ok=True)
+  with open(os.path.join(root, MANIFEST), 'w', encoding='utf-8') as f:
+    json.dump({'version': VERSION, 'documents': manifest}, f, indent=2,
+              sort_keys=True, ensure_ascii=False)
+  logger.info('config table export: %d of %d shards written to %s',
+              written, len(manifest), root)
+
+def setup(app):
+  app.add_config_value('ct_export', False, '')
+  app.connect('builder-inited', builder_inited)
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('build-finished', build_finished)
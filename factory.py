@@ -0,0 +1,171 @@
+# Declarative column config table types.
+#
+# Column tables (e.g. files, ports) are described by their columns. The row
+# renderer for each column layout is generated as a python function once per
+# build, so rows are rendered without interpreting the column description.
+#
+# Additional table types may be described in conf.py, and are registered as
+# directives (see ct.ColumnTable for directive options).
+#
+# conf.py options:
+#   ct_tables: Dictionary of String directive name: Dictionary description.
+#       Default: {}.
+#     label:   String generic dropdown label. Default: directive name, title
+#              cased.
+#     values:  Integer number of :value{N}: options. Default: 21.
+#     columns: List of column Dictionaries (see Column):
+#       title:    String header label. Required.
+#       width:    String column width class in twelfths, e.g. 'col-sm-2'.
+#                 Required.
+#       align:    String row text alignment, 'right' or 'center'. Default:
+#                 None.
+#       required: Boolean True if every row must contain a value for the
+#                 column. Default: False.
+#
+#   Example:
+#     ct_tables = {
+#       'firewall': {
+#         'label': 'Firewall',
+#         'columns': [
+#           {'title': 'Port', 'width': 'col-sm-2', 'align': 'right', 'required': True},
+#           {'title': 'Protocol', 'width': 'col-sm-2'},
+#           {'title': 'Action', 'width': 'col-sm-2'},
+#           {'title': 'Purpose', 'width': 'col-sm-6'},
+#         ],
+#       },
+#     }
+
+import re
+import collections
+from sphinx.errors import ConfigError
+from docutils.parsers.rst import directives
+from . import lazy
+
+# Column width in twelfths, e.g. 'col-sm-2'. Compiled on first use.
+SPAN_PATTERN = r'\bcol-(?:\w+-)?(\d+)\b'
+
+# Default number of :value{N}: options.
+VALUES = 21
+
+Column = collections.namedtuple(
+    'Column', ('title', 'width', 'align', 'required'),
+    defaults=(None, False))
+Column.__doc__ = """Column table column.
+
+  Attributes:
+    title: String header label.
+    width: String column width class in twelfths, e.g. 'col-sm-2'.
+    align: String row text alignment, 'right' or 'center', or None.
+    required: Boolean True if every row must contain a value for the column.
+"""
+
+# Generated row renderers, Tuple of Column: function.
+_renderers = {}
+
+def _source(columns):
+  """Generate python source for a row renderer."""
+  lines = [
+    'def render_row(add_row, row):',
+    '  if len(row) < %d:' % len(columns),
+    "    row = tuple(row) + ('',) * (%d - len(row))" % len(columns),
+  ]
+  for i, column in enumerate(columns):
+    if column.required:
+      lines.append('  if not row[%d]:' % i)
+      lines.append('    raise ValueError(%r)' % ('missing required %s' % column.title))
+  lines.append('  add_row(row[:%d])' % len(columns))
+  return '\n'.join(lines) + '\n'
+
+def renderer(columns):
+  """Return the row renderer for a column layout, generating it on first use.
+
+  Args:
+    columns: Tuple of Column.
+
+  Returns:
+    Function render_row(add_row, row) adding the cells for each column. Raises
+    ValueError if a required column is empty.
+  """
+  try:
+    return _renderers[columns]
+  except KeyError:
+    namespace = {}
+    exec(compile(_source(columns), '<ct row renderer>', 'exec'), namespace)
+    render_row = _renderers[columns] = namespace['render_row']
+    return render_row
+
+def span(width):
+  """Parse a column width class.
+
+  Args:
+    width: String column width class, e.g. 'col-sm-2'.
+
+  Returns:
+    Integer column width in twelfths or None.
+  """
+  match = re.search(SPAN_PATTERN, width)
+  if match and 1 <= int(match.group(1)) <= 12:
+    return int(match.group(1))
+  return None
+
+def option_spec(values=VALUES):
+  """Generate the option spec for a column table.
+
+  Args:
+    values: Integer number of :value{N}: options. Default: VALUES.
+  """
+  spec = {'value%d' % i: directives.unchanged for i in range(values)}
+  spec.update({
+    'values': directives.unchanged,
+    'source': directives.path,
+    'ref': directives.unchanged,
+    'update': directives.unchanged,
+    'delim': directives.unchanged,
+    'open': directives.flag,
+    'generic': directives.flag,
+  })
+  return spec
+
+def columns(description):
+  """Convert a conf.py table description to a Tuple of Column.
+
+  Raises:
+    ConfigError: if the columns are missing or invalid.
+  """
+  try:
+    result = tuple(Column(**c) for c in description['columns'])
+  except (KeyError, TypeError) as e:
+    raise ConfigError('ct_tables: invalid columns: %s' % e)
+  if not result or not all(c.title and c.width for c in result):
+    raise ConfigError('ct_tables: every column requires a title and width')
+  return result
+
+def make(name, description):
+  """Create a column table directive class from a conf.py description.
+
+  Args:
+    name: String directive name.
+    description: Dictionary table description, see ct_tables.
+
+  Returns:
+    ct.ColumnTable subclass.
+  """
+  from . import ct
+  return type(''.join(x.title() for x in re.split(r'[\W_]+', name)),
+              (ct.ColumnTable,), {
+    '__doc__': 'Generate %s elements in a sphinx document.' % name,
+    'label': description.get('label', name.title()),
+    'columns': columns(description),
+    'option_spec': option_spec(description.get('values', VALUES)),
+  })
+
+def config_inited(app, config):
+  _renderers.clear()
+  for name, description in config.ct_tables.items():
+    columns(description)
+    app.add_directive(name, lazy.proxy(name, lambda n=name, d=description: make(n, d)),
+                      override=True)
+
+def setup(app):
+  app.add_config_value('ct_tables', {}, 'env')
+  app.connect('config-inited', config_inited)
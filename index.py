@@ -0,0 +1,80 @@
+# Project wide index of config table rows.
+#
+# Every config table records its sanitized rows in the build environment, per
+# document, so cross page features (e.g. conflict detection, exports) do not
+# need to re-read sources. Records are immutable tuples: parallel build workers
+# are merged by reference (linear in the number of documents), and identical
+# tables share row tuples with the table cache.
+
+import collections
+
+Record = collections.namedtuple('Record', ('directive', 'line', 'title', 'groups', 'target'),
+                                defaults=(None,))
+Record.__doc__ = """Config table index record.
+
+  Attributes:
+    directive: String directive name.
+    line: Integer line number of the directive.
+    title: String directive title.
+    groups: Tuple of (String path or None, Tuple of row Tuples of Strings)
+        Tuples. Tables without paths (e.g. ports) contain a single group.
+    target: String id of the rendered table in the document, or None.
+"""
+
+def _index(env):
+  try:
+    return env.ct_index
+  except AttributeError:
+    env.ct_index = {}
+    return env.ct_index
+
+def note(env, record):
+  """Add a record for the document being read.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    record: Record to add.
+  """
+  _index(env).setdefault(env.docname, []).append(record)
+
+def records(env, directive=None):
+  """Iterate over indexed config tables, in document order.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    directive: String directive name to filter on. Default: None (all).
+
+  Yields:
+    Tuple of (String docname, Record).
+  """
+  index = _index(env)
+  for docname in sorted(index):
+    for record in index[docname]:
+      if directive is None or record.directive == directive:
+        yield docname, record
+
+def document(env, docname):
+  """Return the records of a single document.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    docname: String document name.
+
+  Returns:
+    List of Record, in document order.
+  """
+  return _index(env).get(docname, [])
+
+def env_purge_doc(app, env, docname):
+  _index(env).pop(docname, None)
+
+def env_merge_info(app, env, docnames, other):
+  index = _index(env)
+  other = _index(other)
+  for docname in docnames:
+    if docname in other:
+      index[docname] = other[docname]
+
+def setup(app):
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('env-merge-info', env_merge_info)
@@ -0,0 +1,78 @@
+# Lazy directive and role registration.
+#
+# Directive classes and roles are registered as lightweight proxies and only
+# imported on first use, so projects pay the import cost only for the config
+# tables they use (e.g. a project using only :cmdmenu: never imports ct.py or
+# the docutils table machinery).
+
+import importlib
+
+def _load(module, name):
+  """Import module (relative to this package) and return its attribute name."""
+  return getattr(importlib.import_module(module, __package__), name)
+
+
+class _LazyDirectiveType(type):
+  """Resolve directive class attributes (e.g. option_spec) on first access."""
+
+  def __getattr__(cls, name):
+    if name.startswith('__'):
+      raise AttributeError(name)
+    return getattr(cls.load(), name)
+
+
+def proxy(name, load):
+  """Create a directive class proxy, creating the directive on first use.
+
+  Args:
+    name: String proxy class name.
+    load: Callable returning the directive class.
+
+  Returns:
+    Class which docutils may register and instantiate as the directive class.
+  """
+  loaded = []
+
+  def cached():
+    if not loaded:
+      loaded.append(load())
+    return loaded[0]
+
+  return _LazyDirectiveType(name, (object,), {
+    '__doc__': 'Lazily created %s directive.' % name,
+    'load': staticmethod(cached),
+    '__new__': lambda cls, *args, **kwargs: cached()(*args, **kwargs),
+  })
+
+def directive(module, name):
+  """Create a directive class proxy, importing the directive on first use.
+
+  Args:
+    module: String module relative to this package, e.g. '.v2.gpo'.
+    name: String directive class name in module.
+
+  Returns:
+    Class which docutils may register and instantiate as the directive class.
+  """
+  return proxy(name, lambda: _load(module, name))
+
+def role(module, name):
+  """Create a role function, importing the role on first use.
+
+  Args:
+    module: String module relative to this package, e.g. '.v2.cmdmenu'.
+    name: String role function or class name in module. Classes are
+        instantiated once.
+
+  Returns:
+    Callable docutils role.
+  """
+  loaded = []
+
+  def lazy_role(role_name, rawtext, text, lineno, inliner, options={}, content=[]):
+    if not loaded:
+      obj = _load(module, name)
+      loaded.append(obj() if isinstance(obj, type) else obj)
+    return loaded[0](role_name, rawtext, text, lineno, inliner, options, content)
+
+  return lazy_role
@@ -0,0 +1,74 @@
+# Compact config table row model.
+#
+# Rows are plain tuples of Strings, created once when options and source files
+# are sanitized, and shared by the project index (index.py), the table cache
+# and the stored ct_data rows (elements.py) without further copies. Cells which
+# are a single badge token (e.g. '{TCP}') and column headers are interned, so
+# each distinct token is held once regardless of the number of rows.
+
+import functools
+import sys
+
+def cell(text):
+  """Sanitize a cell, stripping whitespace and interning badge tokens.
+
+  Args:
+    text: String cell text.
+
+  Returns:
+    String stripped cell text.
+  """
+  text = text.strip()
+  if text[:1] == '{' and text[-1:] == '}':
+    return sys.intern(text)
+  return text
+
+def row(cells):
+  """Create a row from an iterable of String cells.
+
+  Args:
+    cells: Iterable of String cell text.
+
+  Returns:
+    Tuple of String stripped cells.
+  """
+  return tuple(map(cell, cells))
+
+def split(line, delim):
+  """Create a row from a delimited line.
+
+  Args:
+    line: String line of cells.
+    delim: String delimeter to split on.
+
+  Returns:
+    Tuple of String stripped cells.
+  """
+  return tuple(map(cell, line.split(delim)))
+
+def pad(cells, width):
+  """Pad a row with empty cells.
+
+  Args:
+    cells: Tuple of String cells.
+    width: Integer minimum number of cells.
+
+  Returns:
+    Tuple of String cells, the row itself if it has at least width cells.
+  """
+  if len(cells) >= width:
+    return cells
+  return cells + ('',) * (width - len(cells))
+
+@functools.lru_cache(maxsize=None)
+def header(titles):
+  """Create a shared, interned header row.
+
+  Args:
+    titles: Tuple of String column titles.
+
+  Returns:
+    Tuple of interned String column titles, shared by every table using the
+    same titles.
+  """
+  return tuple(sys.intern(title) for title in titles)
@@ -0,0 +1,221 @@
+# Config table row sources, loaded with the :source: option.
+#
+# Source files are parsed once per build and shared by every document that
+# references them. Files referenced in the previous build (and any matching
+# ct_source_prefetch) are parsed in a thread pool at builder-inited, while
+# sphinx prepares the build. Each document notes its source files as
+# dependencies, so incremental builds re-read only documents whose source
+# files changed.
+#
+# Every row in a file is rendered as a table row; files should not contain a
+# header row. Supported formats, by extension:
+#   .csv, .tsv:   One row per line.
+#   .json:        List of rows; each row a list of cells, or an object whose
+#                 values are the cells in order.
+#   .yaml, .yml:  Same structure as JSON. Requires PyYAML.
+#
+# conf.py options:
+#   ct_source_prefetch: List of glob patterns, relative to the source
+#       directory, of source files to parse at builder-inited. Default: [].
+#   ct_source_workers: Integer number of prefetch threads. Default: 4.
+
+import os
+import csv
+import glob
+import json
+from . import model
+
+class SourceError(Exception):
+  """Raised when a source file cannot be read or parsed."""
+
+
+def _cells(row):
+  """Convert a parsed row to a row Tuple of stripped Strings (see model.py)."""
+  if isinstance(row, dict):
+    row = row.values()
+  elif not isinstance(row, (list, tuple)):
+    row = [row]
+  return model.row('' if x is None else str(x) for x in row)
+
+def _parse_csv(path, delimiter=','):
+  with open(path, newline='', encoding='utf-8-sig') as f:
+    return [_cells(row) for row in csv.reader(f, delimiter=delimiter) if row]
+
+def _parse_tsv(path):
+  return _parse_csv(path, '\t')
+
+def _parse_json(path):
+  with open(path, encoding='utf-8-sig') as f:
+    return [_cells(row) for row in json.load(f)]
+
+def _parse_yaml(path):
+  try:
+    import yaml
+  except ImportError:
+    raise SourceError('PyYAML is required to read %s' % path)
+  with open(path, encoding='utf-8-sig') as f:
+    return [_cells(row) for row in yaml.safe_load(f) or []]
+
+PARSERS = {
+  '.csv': _parse_csv,
+  '.tsv': _parse_tsv,
+  '.json': _parse_json,
+  '.yaml': _parse_yaml,
+  '.yml': _parse_yaml,
+}
+
+def load(path):
+  """Parse a source file to rows.
+
+  Args:
+    path: String absolute path to the source file.
+
+  Returns:
+    List of row Tuples of Strings, one Tuple per row (see model.py).
+
+  Raises:
+    SourceError: if the file type is unsupported, or the file cannot be read
+        or parsed.
+  """
+  ext = os.path.splitext(path)[1].lower()
+  try:
+    parser = PARSERS[ext]
+  except KeyError:
+    raise SourceError('unsupported source file type %r: %s' % (ext, path))
+  try:
+    return parser(path)
+  except SourceError:
+    raise
+  except (OSError, ValueError, TypeError, csv.Error) as e:
+    raise SourceError('could not read source %s: %s' % (path, e))
+  except Exception as e:
+    # yaml.YAMLError, without requiring yaml at import.
+    raise SourceError('could not parse source %s: %s' % (path, e))
+
+
+class SourceCache(object):
+  """Build-wide cache of parsed source files.
+
+  Each file is stored as a future, completed either by the prefetch thread
+  pool or on first use.
+  """
+
+  def __init__(self):
+    self._files = {}
+    self._pool = None
+
+  def clear(self):
+    """Remove all cached files."""
+    self.join()
+    self._files = {}
+
+  def prefetch(self, paths, workers=4):
+    """Parse source files in a thread pool.
+
+    Args:
+      paths: Iterable of String absolute paths.
+      workers: Integer number of threads.
+    """
+    # Only row sources are prefetched; other files (e.g. .reg) are parsed on
+    # first use with directive specific arguments.
+    paths = [p for p in paths if p not in self._files and os.path.isfile(p)
+             and os.path.splitext(p)[1].lower() in PARSERS]
+    if not paths:
+      return
+    from concurrent import futures
+    self._pool = futures.ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='ct-source')
+    for path in paths:
+      self._files[path] = self._pool.submit(load, path)
+
+  def join(self):
+    """Wait for all prefetched files to be parsed."""
+    if self._pool:
+      self._pool.shutdown(wait=True)
+      self._pool = None
+
+  def get(self, key, loader, *args):
+    """Return the cached result of loader(*args), loading on first use.
+
+    Args:
+      key: Hashable cache key.
+      loader: Callable to parse the file, raising SourceError on failure.
+      *args: Arguments for loader.
+
+    Raises:
+      SourceError: if the file cannot be read or parsed.
+    """
+    future = self._files.get(key)
+    if future is None:
+      from concurrent import futures
+      future = self._files[key] = futures.Future()
+      try:
+        future.set_result(loader(*args))
+      except SourceError as e:
+        future.set_exception(e)
+    return future.result()
+
+  def rows(self, path):
+    """Return parsed rows for a source file.
+
+    Args:
+      path: String absolute path to the source file.
+
+    Returns:
+      List of row Tuples of Strings, one Tuple per row (see model.py).
+
+    Raises:
+      SourceError: if the file cannot be read or parsed.
+    """
+    return self.get(path, load, path)
+
+files = SourceCache()
+
+def note_source(env, relpath):
+  """Record a document's source file, for dependency tracking and prefetch.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    relpath: String source file path relative to the source directory.
+  """
+  env.note_dependency(relpath)
+  if not hasattr(env, 'ct_sources'):
+    env.ct_sources = {}
+  env.ct_sources.setdefault(env.docname, set()).add(relpath)
+
+def builder_inited(app):
+  files.clear()
+  env = app.env
+  paths = set()
+  for relpaths in getattr(env, 'ct_sources', {}).values():
+    paths.update(os.path.join(env.srcdir, p) for p in relpaths)
+  for pattern in app.config.ct_source_prefetch:
+    paths.update(glob.glob(os.path.join(env.srcdir, pattern), recursive=True))
+  files.prefetch(sorted(paths), app.config.ct_source_workers)
+
+def env_before_read_docs(app, env, docnames):
+  # Worker processes are forked for parallel reads; finish prefetching first.
+  if app.parallel > 1:
+    files.join()
+
+def env_purge_doc(app, env, docname):
+  getattr(env, 'ct_sources', {}).pop(docname, None)
+
+def env_merge_info(app, env, docnames, other):
+  if not hasattr(env, 'ct_sources'):
+    env.ct_sources = {}
+  for docname in docnames:
+    if docname in getattr(other, 'ct_sources', {}):
+      env.ct_sources[docname] = other.ct_sources[docname]
+
+def build_finished(app, exception):
+  files.join()
+
+def setup(app):
+  app.add_config_value('ct_source_prefetch', [], '')
+  app.add_config_value('ct_source_workers', 4, '')
+  app.connect('builder-inited', builder_inited)
+  app.connect('env-before-read-docs', env_before_read_docs)
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('env-merge-info', env_merge_info)
+  app.connect('build-finished', build_finished)
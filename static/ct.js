@@ -0,0 +1,16 @@
+/* Config tables: sphinx-configtable, ct_html_lazy.
+ *
+ * Closed config tables carry their body as an inert <template>, which is
+ * turned into DOM the first time the table is opened. toggle events do not
+ * bubble, so they are handled in the capture phase.
+ */
+document.addEventListener('toggle', function (event) {
+  var details = event.target;
+  if (!details.open || !details.classList || !details.classList.contains('ct-table')) {
+    return;
+  }
+  var template = details.querySelector(':scope > template.ct-body');
+  if (template) {
+    details.replaceChild(template.content, template);
+  }
+}, true);
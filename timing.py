@@ -0,0 +1,309 @@
+# Opt-in timing instrumentation for config table directives and roles.
+#
+# Each config table directive and :cmdmenu: role call is timed by phase:
+#   sanitize: Parsing and sanitizing options.
+#   render:   Generating nodes (including badges).
+#   parse:    Parsing directive content.
+# Phases are exclusive: time in a phase nested within another (e.g. sanitize
+# within render for config tables) is only counted for the nested phase.
+# Directive and role calls nested within another call (e.g. :cmdmenu: in a
+# table cell) are recorded as their own calls, and excluded from the total and
+# phases of the enclosing call, so no time is counted twice.
+#
+# Timings are recorded per document by a Profiler kept in module state, never
+# in the build environment, so they are not pickled with the environment.
+# Parallel build workers return compact per document records with their
+# environment, which are merged into the Profiler at env-merge-info. At
+# build-finished a JSON report is written to the output directory and a
+# summary of the slowest directives, documents and calls is logged.
+#
+# conf.py options:
+#   ct_profile: Boolean True to enable timing. Default: False.
+#   ct_profile_top: Integer number of entries in each logged summary, and
+#       number of slowest calls in the report. Default: 10.
+#   ct_profile_cprofile: Boolean True to run each call under cProfile, keeping
+#       stats for the slowest ct_profile_top calls. Stats are written to
+#       ct_profile/*.prof in the output directory, for use with pstats.
+#       Default: False.
+
+import os
+import json
+import heapq
+import shutil
+import marshal
+import contextlib
+from time import perf_counter
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+REPORT = 'ct_profile.json'
+STATS_DIR = 'ct_profile'
+
+class Timer(object):
+  """Accumulates exclusive phase durations for a single directive or role call.
+
+  Attributes:
+    phases: Dictionary of phase name: Float seconds, excluding time in nested
+        phases and nested calls.
+    calls: Float seconds spent in nested directive or role calls.
+  """
+
+  def __init__(self):
+    self.phases = {}
+    self.calls = 0.0
+    self._nested = []
+
+  @contextlib.contextmanager
+  def phase(self, name):
+    """Time a phase, adding to any existing time for the phase."""
+    start = perf_counter()
+    self._nested.append(0.0)
+    try:
+      yield
+    finally:
+      elapsed = perf_counter() - start
+      self.phases[name] = self.phases.get(name, 0.0) + elapsed - self._nested.pop()
+      if self._nested:
+        self._nested[-1] += elapsed
+
+  def exclude(self, seconds):
+    """Exclude the time of a nested call from this call and its active phase."""
+    self.calls += seconds
+    if self._nested:
+      self._nested[-1] += seconds
+
+
+class NullTimer(object):
+  """Timer used when profiling is disabled."""
+
+  _null = contextlib.nullcontext()
+
+  def phase(self, name):
+    return self._null
+
+
+NULL_TIMER = NullTimer()
+
+
+class Profiler(object):
+  """Per document directive timings for a build.
+
+  Attributes:
+    top: Integer number of slowest calls to keep cProfile stats for.
+    cprofile: Boolean True to run calls under cProfile.
+    calls: Dictionary of docname: List of call record dictionaries.
+    pid: Integer id of the process which created the Profiler.
+  """
+
+  def __init__(self, top=10, cprofile=False):
+    self.top = top
+    self.cprofile = cprofile
+    self.calls = {}
+    self.pid = os.getpid()
+    self._slowest = []
+    self._timers = []
+
+  def call(self, name, docname, lineno, func):
+    """Time a directive or role call.
+
+    Args:
+      name: String directive or role name.
+      docname: String document being read.
+      lineno: Integer line number of the call.
+      func: Callable accepting a Timer, returning the directive result.
+
+    Returns:
+      Result of func.
+    """
+    timer = Timer()
+    # Nested calls (e.g. roles in table cells) are timed but not profiled.
+    prof = None
+    if self.cprofile and not self._timers:
+      import cProfile
+      prof = cProfile.Profile()
+      prof.enable()
+    self._timers.append(timer)
+    start = perf_counter()
+    try:
+      return func(timer)
+    finally:
+      total = perf_counter() - start
+      self._timers.pop()
+      if prof:
+        prof.disable()
+      if self._timers:
+        self._timers[-1].exclude(total)
+      self._record(name, docname, lineno, total - timer.calls, timer.phases, prof)
+
+  def _record(self, name, docname, lineno, total, phases, prof):
+    record = {
+      'directive': name,
+      'docname': docname,
+      'line': lineno,
+      'total': total,
+      'phases': phases,
+      'stats': None,
+    }
+    self.calls.setdefault(docname, []).append(record)
+    if prof and self._slowest_call(total):
+      prof.create_stats()
+      self._keep_stats(record, prof.stats)
+
+  def _slowest_call(self, total):
+    """Return True if a call is one of the slowest top calls so far."""
+    return len(self._slowest) < self.top or total > self._slowest[0][0]
+
+  def _keep_stats(self, record, stats):
+    """Keep cProfile stats for a call, dropping stats of the fastest call."""
+    record['stats'] = stats
+    heapq.heappush(self._slowest, (record['total'], id(record), record))
+    if len(self._slowest) > self.top:
+      heapq.heappop(self._slowest)[2]['stats'] = None
+
+  def purge(self, docname):
+    """Remove timings for a document which is being re-read."""
+    self.calls.pop(docname, None)
+
+  def export(self, docname):
+    """Return compact timings for a document, see merge().
+
+    Returns:
+      Tuple of (String directive, Integer line, Float total, Dictionary
+      phases, cProfile stats or None) Tuples.
+    """
+    return tuple((r['directive'], r['line'], r['total'], r['phases'], r['stats'])
+                 for r in self.calls.get(docname, ()))
+
+  def merge(self, docname, calls):
+    """Merge timings for a document read by a parallel build worker.
+
+    Args:
+      docname: String document name.
+      calls: Tuple of compact call Tuples, see export().
+    """
+    records = self.calls[docname] = []
+    for directive, line, total, phases, stats in calls:
+      record = {
+        'directive': directive,
+        'docname': docname,
+        'line': line,
+        'total': total,
+        'phases': phases,
+        'stats': None,
+      }
+      records.append(record)
+      if stats and self._slowest_call(total):
+        self._keep_stats(record, stats)
+
+  def report(self):
+    """Aggregate timings.
+
+    Returns:
+      Dictionary containing per directive and per document totals, and the
+      slowest calls.
+    """
+    directives = {}
+    documents = {}
+    for docname, records in self.calls.items():
+      doc = documents.setdefault(docname, {'count': 0, 'total': 0.0})
+      for record in records:
+        doc['count'] += 1
+        doc['total'] += record['total']
+        entry = directives.setdefault(
+            record['directive'], {'count': 0, 'total': 0.0, 'phases': {}})
+        entry['count'] += 1
+        entry['total'] += record['total']
+        for phase, duration in record['phases'].items():
+          entry['phases'][phase] = entry['phases'].get(phase, 0.0) + duration
+    slowest = heapq.nlargest(
+        self.top,
+        (r for records in self.calls.values() for r in records),
+        key=lambda r: r['total'])
+    return {'directives': directives, 'documents': documents, 'slowest': slowest}
+
+
+# Profiler for the current build, or None if profiling is disabled.
+_profiler = None
+
+def get():
+  """Return the build Profiler, or None if profiling is disabled."""
+  return _profiler
+
+def builder_inited(app):
+  global _profiler
+  if app.config.ct_profile:
+    _profiler = Profiler(app.config.ct_profile_top, app.config.ct_profile_cprofile)
+  else:
+    _profiler = None
+
+def env_purge_doc(app, env, docname):
+  if _profiler:
+    _profiler.purge(docname)
+
+def doctree_read(app, doctree):
+  # Parallel build workers (forked processes) return timings of the documents
+  # they read with their environment.
+  if _profiler and os.getpid() != _profiler.pid:
+    env = app.env
+    calls = _profiler.export(env.docname)
+    if calls:
+      if not hasattr(env, 'ct_profile_calls'):
+        env.ct_profile_calls = {}
+      env.ct_profile_calls[env.docname] = calls
+
+def env_merge_info(app, env, docnames, other):
+  calls = getattr(other, 'ct_profile_calls', None)
+  if _profiler and calls:
+    for docname in docnames:
+      if docname in calls:
+        _profiler.merge(docname, calls[docname])
+
+def _write_stats(outdir, index, record):
+  """Write cProfile stats for a call, returning the file name."""
+  name = '%02d-%s-%s.prof' % (index, record['directive'],
+                              record['docname'].replace('/', '_'))
+  os.makedirs(os.path.join(outdir, STATS_DIR), exist_ok=True)
+  with open(os.path.join(outdir, STATS_DIR, name), 'wb') as f:
+    marshal.dump(record['stats'], f)
+  return os.path.join(STATS_DIR, name)
+
+def build_finished(app, exception):
+  profiler = _profiler
+  if not profiler or exception:
+    return
+  report = profiler.report()
+  shutil.rmtree(os.path.join(app.outdir, STATS_DIR), ignore_errors=True)
+  for index, record in enumerate(report['slowest']):
+    if record['stats']:
+      record['profile'] = _write_stats(app.outdir, index, record)
+  report['slowest'] = [
+      {k: v for k, v in r.items() if k != 'stats'} for r in report['slowest']]
+  path = os.path.join(app.outdir, REPORT)
+  with open(path, 'w') as f:
+    json.dump(report, f, indent=2, sort_keys=True)
+
+  top = app.config.ct_profile_top
+  logger.info('config table timings (%s):', path)
+  for name, entry in sorted(report['directives'].items(),
+                            key=lambda x: x[1]['total'], reverse=True)[:top]:
+    logger.info('  %-10s %6d calls %8.3fs (%s)', name, entry['count'],
+                entry['total'], ', '.join('%s %.3fs' % p for p in sorted(entry['phases'].items())))
+  logger.info('slowest documents:')
+  for docname, entry in sorted(report['documents'].items(),
+                               key=lambda x: x[1]['total'], reverse=True)[:top]:
+    logger.info('  %8.3fs %6d calls %s', entry['total'], entry['count'], docname)
+  logger.info('slowest calls:')
+  for record in report['slowest']:
+    logger.info('  %8.3fs %s:%s %s', record['total'], record['docname'],
+                record['line'], record['directive'])
+
+def setup(app):
+  app.add_config_value('ct_profile', False, '')
+  app.add_config_value('ct_profile_top', 10, '')
+  app.add_config_value('ct_profile_cprofile', False, '')
+  app.connect('builder-inited', builder_inited)
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('doctree-read', doctree_read)
+  app.connect('env-merge-info', env_merge_info)
+  app.connect('build-finished', build_finished)
@@ -0,0 +1,314 @@
+# Group policy definition (ADMX/ADML) index for the gpo directive.
+#
+# Policies are looked up by name in a PolicyDefinitions directory (*.admx, with
+# language resources in {language}/*.adml). Each file is parsed incrementally
+# with iterparse into a compact per file index of categories, supported on
+# definitions and policies, keeping only the display strings that are used.
+#
+# The index is built once per build at builder-inited and pickled to the
+# doctree directory; files are only parsed again when their mtimes change.
+#
+# conf.py options:
+#   ct_gpo_policy_definitions: String PolicyDefinitions directory, relative to
+#       the configuration directory. Default: None (disabled).
+#   ct_gpo_policy_language: String ADML language directory. Default: 'en-US'.
+
+import os
+import glob
+import pickle
+import collections
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE = 'ct_admx.pickle'
+# Increment when the index format changes.
+CACHE_VERSION = 1
+
+# Policy class: (Configuration, registry hive).
+CLASSES = {
+  'Machine': ('Computer Configuration', 'HKEY_LOCAL_MACHINE'),
+  'User': ('User Configuration', 'HKEY_CURRENT_USER'),
+  'Both': ('Computer Configuration', 'HKEY_LOCAL_MACHINE'),
+}
+
+Policy = collections.namedtuple('Policy', (
+    'namespace', 'name', 'cls', 'display', 'key', 'value', 'enabled',
+    'disabled', 'elements', 'category', 'supported', 'files'))
+Policy.__doc__ = """Policy definition.
+
+  Attributes:
+    namespace: String ADMX target namespace.
+    name: String policy name.
+    cls: String policy class (Machine, User or Both).
+    display: String policy display name.
+    key: String registry key, without hive.
+    value: String registry value name or None.
+    enabled: String enabled value, '{DELETE}' or None.
+    disabled: String disabled value, '{DELETE}' or None.
+    elements: Tuple of (String type, String key, String value name) Tuples.
+    category: String qualified parent category or None.
+    supported: String qualified supported on definition or None.
+    files: Tuple of String absolute ADMX and ADML paths.
+"""
+
+def _tag(elem):
+  """Return element tag without namespace."""
+  return elem.tag.rpartition('}')[2]
+
+def _string_id(text):
+  """Return the string id of a '$(string.ID)' reference, or None."""
+  if text and text.startswith('$(string.') and text.endswith(')'):
+    return text[9:-1]
+  return None
+
+def _setting(elem):
+  """Convert an enabledValue/disabledValue element to a String."""
+  for child in elem:
+    tag = _tag(child)
+    if tag == 'delete':
+      return '{DELETE}'
+    if tag == 'decimal':
+      return child.get('value')
+    if tag == 'string':
+      return child.text or ''
+  return None
+
+def _parse_admx(path):
+  """Parse an ADMX file.
+
+  Returns:
+    Tuple of (Dictionary partial index, Set of String string ids used).
+  """
+  target = None
+  prefixes = {}
+  categories = {}
+  supported = {}
+  policies = []
+  strings = set()
+
+  def qualify(ref):
+    if not ref:
+      return None
+    prefix, _, name = ref.rpartition(':')
+    return '%s:%s' % (prefixes.get(prefix, target) if prefix else target, name)
+
+  def display(text):
+    string_id = _string_id(text)
+    if string_id:
+      strings.add(string_id)
+    return text
+
+  from xml.etree import ElementTree
+  for _, elem in ElementTree.iterparse(path):
+    tag = _tag(elem)
+    if tag in ('target', 'using'):
+      prefixes[elem.get('prefix')] = elem.get('namespace')
+      if tag == 'target':
+        target = elem.get('namespace')
+    elif tag == 'definition':
+      supported[qualify(elem.get('name'))] = display(elem.get('displayName'))
+      elem.clear()
+    elif tag == 'category':
+      parent = elem.find('{*}parentCategory')
+      categories[qualify(elem.get('name'))] = (
+          display(elem.get('displayName')),
+          qualify(parent.get('ref')) if parent is not None else None)
+      elem.clear()
+    elif tag == 'policy':
+      parent = elem.find('{*}parentCategory')
+      supported_on = elem.find('{*}supportedOn')
+      enabled = elem.find('{*}enabledValue')
+      disabled = elem.find('{*}disabledValue')
+      elements = elem.find('{*}elements')
+      policies.append(Policy(
+          target,
+          elem.get('name'),
+          elem.get('class', 'Machine'),
+          display(elem.get('displayName')),
+          elem.get('key'),
+          elem.get('valueName'),
+          _setting(enabled) if enabled is not None else None,
+          _setting(disabled) if disabled is not None else None,
+          tuple((_tag(e), e.get('key'), e.get('valueName') or e.get('id'))
+                for e in (elements if elements is not None else ())),
+          qualify(parent.get('ref')) if parent is not None else None,
+          qualify(supported_on.get('ref')) if supported_on is not None else None,
+          None))
+      elem.clear()
+  return {'categories': categories, 'supported': supported, 'policies': policies}, strings
+
+def _parse_adml(path, ids):
+  """Parse display strings from an ADML file.
+
+  Args:
+    path: String absolute ADML path.
+    ids: Set of String string ids to keep.
+
+  Returns:
+    Dictionary of String id: String text.
+  """
+  from xml.etree import ElementTree
+  strings = {}
+  for _, elem in ElementTree.iterparse(path):
+    if _tag(elem) == 'string':
+      if elem.get('id') in ids:
+        strings[elem.get('id')] = (elem.text or '').strip()
+      elem.clear()
+  return strings
+
+def parse(admx, adml):
+  """Parse an ADMX file and its ADML resources to a partial index.
+
+  Args:
+    admx: String absolute ADMX path.
+    adml: String absolute ADML path or None.
+
+  Returns:
+    Dictionary containing 'categories' (qualified name: (display, parent)),
+    'supported' (qualified name: display) and 'policies' (List of Policy).
+  """
+  entry, ids = _parse_admx(admx)
+  strings = _parse_adml(adml, ids) if adml else {}
+  files = (admx, adml) if adml else (admx,)
+
+  def resolve(text):
+    string_id = _string_id(text)
+    return strings.get(string_id, string_id) if string_id else text
+
+  entry['supported'] = {k: resolve(v) for k, v in entry['supported'].items()}
+  entry['categories'] = {
+      k: (resolve(v[0]), v[1]) for k, v in entry['categories'].items()}
+  entry['policies'] = [
+      p._replace(display=resolve(p.display), files=files) for p in entry['policies']]
+  return entry
+
+
+class PolicyIndex(object):
+  """Index of group policy definitions.
+
+  Attributes:
+    policies: Dictionary of String policy name: List of Policy.
+    categories: Dictionary of qualified category: (display, parent).
+    supported: Dictionary of qualified supported on definition: display.
+  """
+
+  def __init__(self):
+    self.clear()
+
+  def clear(self):
+    """Remove all policy definitions."""
+    self._files = {}
+    self.policies = {}
+    self.categories = {}
+    self.supported = {}
+
+  def update(self, directory, language):
+    """Parse new and changed definition files.
+
+    Args:
+      directory: String absolute PolicyDefinitions directory.
+      language: String ADML language directory.
+
+    Returns:
+      Integer number of files parsed.
+    """
+    from xml.etree import ElementTree
+    files = {}
+    parsed = 0
+    for admx in sorted(glob.glob(os.path.join(directory, '*.admx'))):
+      adml = os.path.join(directory, language,
+                          os.path.splitext(os.path.basename(admx))[0] + '.adml')
+      if not os.path.isfile(adml):
+        adml = None
+      signature = tuple((p, os.stat(p).st_mtime_ns) for p in (admx, adml) if p)
+      cached = self._files.get(admx)
+      if cached and cached[0] == signature:
+        files[admx] = cached
+        continue
+      try:
+        files[admx] = (signature, parse(admx, adml))
+      except (OSError, ElementTree.ParseError) as e:
+        logger.warning('could not parse policy definitions %s: %s', admx, e)
+        continue
+      parsed += 1
+    self._files = files
+    self.policies = {}
+    self.categories = {}
+    self.supported = {}
+    for _, entry in files.values():
+      self.categories.update(entry['categories'])
+      self.supported.update(entry['supported'])
+      for policy in entry['policies']:
+        self.policies.setdefault(policy.name, []).append(policy)
+    return parsed
+
+  def load(self, path):
+    """Load cached files from a previous build, ignoring invalid caches."""
+    try:
+      with open(path, 'rb') as f:
+        version, files = pickle.load(f)
+    except Exception:
+      return
+    if version == CACHE_VERSION:
+      self._files = files
+
+  def save(self, path):
+    """Save parsed files for the next build."""
+    with open(path, 'wb') as f:
+      pickle.dump((CACHE_VERSION, self._files), f, pickle.HIGHEST_PROTOCOL)
+
+  def get(self, name):
+    """Find a policy by name.
+
+    Args:
+      name: String policy name, optionally qualified with the ADMX target
+          namespace, e.g. 'Microsoft.Policies.AutoPlay:Autorun'.
+
+    Returns:
+      Policy.
+
+    Raises:
+      KeyError: if the policy is not found, or the name is ambiguous.
+    """
+    namespace, _, name = name.strip().rpartition(':')
+    policies = [p for p in self.policies.get(name, ())
+                if not namespace or p.namespace == namespace]
+    if not policies:
+      raise KeyError('policy %r not found' % name)
+    if len(policies) > 1:
+      raise KeyError('policy %r is ambiguous, qualify with one of: %s' % (
+          name, ', '.join(sorted(p.namespace for p in policies))))
+    return policies[0]
+
+  def path(self, policy):
+    """Return the List of display names from the configuration to policy."""
+    parts = []
+    category = policy.category
+    while category in self.categories and len(parts) < 32:
+      display, category = self.categories[category]
+      parts.append(display)
+    return ([CLASSES.get(policy.cls, CLASSES['Machine'])[0],
+             'Administrative Templates'] + parts[::-1] + [policy.display])
+
+
+index = PolicyIndex()
+
+def builder_inited(app):
+  index.clear()
+  if not app.config.ct_gpo_policy_definitions:
+    return
+  directory = os.path.join(app.confdir, app.config.ct_gpo_policy_definitions)
+  cache = os.path.join(app.doctreedir, CACHE)
+  index.load(cache)
+  parsed = index.update(directory, app.config.ct_gpo_policy_language)
+  if parsed:
+    os.makedirs(app.doctreedir, exist_ok=True)
+    index.save(cache)
+  logger.info('policy definitions: %d policies, %d files parsed',
+              sum(map(len, index.policies.values())), parsed)
+
+def setup(app):
+  app.add_config_value('ct_gpo_policy_definitions', None, 'env')
+  app.add_config_value('ct_gpo_policy_language', 'en-US', 'env')
+  app.connect('builder-inited', builder_inited)
@@ -1,4 +1,42 @@
 # Badges RST template configuration.
+#
+# Badge tokens ({KEYWORD}) are replaced anywhere within text using a single
+# precompiled token pattern and a dictionary lookup, so substitution is a
+# single linear pass regardless of the number of badges defined.
+#
+# The badge table is built on first use. Each badge is rendered to nodes once
+# per build, on first use; each use is a copy of the prototype nodes, instead
+# of parsing the :badge: role.
+#
+# Badge tokens used by each document are recorded in the build environment.
+# When a badge definition changes, only documents using the badge are re-read.
+#
+# conf.py options:
+#   ct_badges: Dictionary of String token: String rst badge definition, added
+#       to (or replacing) the built-in badges. Tokens may omit the brackets.
+#       Definitions may only contain :badge:`text,classes` roles and plain
+#       text; definitions with other rst markup are ignored with a warning.
+#       Default: {}.
+#
+#   Example:
+#     ct_badges = {
+#       '{VPN}': ':badge:`VPN,badge-info badge-pill`',
+#     }
+
+import re
+from docutils import nodes
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches a single badge token, e.g. {ON}. Unknown tokens are left as is.
+TOKEN_RE = re.compile(r'\{[^{}]*\}')
+
+# Matches a rendered badge role within a badge definition.
+ROLE_RE = re.compile(r':badge:`([^`]*)`')
+
+# Matches rst inline markup outside of badge roles, which is not rendered.
+MARKUP_RE = re.compile(r'[`*|\\]|_\b')
 
 class Template(object):
   primary=':badge:`%s,badge-primary badge-pill`'
@@ -17,139 +55,393 @@ def ref(ref):
 def update(text):
   return '%s' % (Template.secondary % ('Updated: %s' % text or 'Never'))
 
-badges = {
-  # Account / Authorization
-  '{USER}': Template.info % 'USER',
-  '{PASS}': Template.info % 'PASS',
-  '{EMAIL}': Template.info % 'EMAIL',
-  '{TOKEN}': Template.info % 'TOKEN',
-  '{KEY}': Template.info % 'KEY',
-  '{SID}': Template.info % 'SID',
-  '{UUID}': Template.info % 'UUID',
-
-  # Options
-  '{ON}': Template.success % 'ON',
-  '{OFF}': Template.danger % 'OFF',
-  '{YES}': Template.success % 'YES',
-  '{NO}': Template.danger % 'NO',
-  '{ACTIVE}': Template.success % 'ACTIVE',
-  '{ACCEPT}': Template.success % 'ACCEPT',
-  '{DROP}': Template.danger % 'DROP',
-  '{DISABLE}': Template.danger % 'DISABLE',
-  '{DISABLED}': Template.danger % 'DISABLED',
-  '{ENABLED}': Template.success % 'ENABLED',
-  '{ENABLE}': Template.success % 'ENABLE',
-  '{ENTER}': Template.info % 'ENTER',
-  '{ANY}': Template.info % 'ANY',
-  '{SUCCESS}': Template.success % 'SUCCESS',
-  '{FAILURE}': Template.danger % 'FAILURE',
-  '{EMPTY}': Template.danger % 'EMPTY',
-  '{BLOCK}': Template.danger % 'BLOCK',
-
-  # Location / Time
-  '{TZ}': Template.info % 'TZ',
-  '{COUNTRY}': Template.info % 'COUNTRY',
-
-  # Descriptors / Actions
-  '{ADD}': Template.success % 'ADD',
-  '{DELETE}': Template.danger % 'DELETE',
-  '{DESCRIPTION}': Template.info % 'DESCRIPTION',
-  '{OPTIONAL}': Template.info % 'OPTIONAL',
-  '{DRIVE}': Template.info % 'DRIVE',
-  '{LMB}': Template.info % '🖯',
-  '{MMB}': Template.info % '🖰',
-  '{RMB}': Template.info % '🖱',
-
-  # Services
-  '{STARTED}': Template.success % 'STARTED',
-  '{STOPPED}': Template.danger % 'STOPPED',
-  '{AUTOMATIC}': Template.info % 'AUTOMATIC',
-
-  # Regedit
-  '{DWORD}': Template.info % 'DWORD',
-  '{REG_DWORD}': Template.info % 'DWORD',
-  '{SZ}': Template.info % 'SZ',
-  '{REG_SZ}': Template.info % 'SZ',
-  '{BINARY}': Template.info % 'BINARY',
-  '{REG_BINARY}': Template.info % 'BINARY',
-  '{DWORD_LITTLE_ENDIAN}': Template.info % 'DWORD_LITTLE_ENDIAN',
-  '{REG_DWORD_LITTLE_ENDIAN}': Template.info % 'DWORD_LITTLE_ENDIAN',
-  '{DWORD_BIG_ENDIAN}': Template.info % 'DWORD_BIG_ENDIAN',
-  '{REG_DWORD_BIG_ENDIAN}': Template.info % 'DWORD_BIG_ENDIAN',
-  '{EXPAND_SZ}': Template.info % 'EXPAND_SZ',
-  '{REG_EXPAND_SZ}': Template.info % 'EXPAND_SZ',
-  '{LINK}': Template.info % 'LINK',
-  '{REG_LINK}': Template.info % 'LINK',
-  '{MULTI_SZ}': Template.info % 'MULTI_SZ',
-  '{REG_MULTI_SZ}': Template.info % 'MULTI_SZ',
-  '{NONE}': Template.info % 'NONE',
-  '{REG_NONE}': Template.info % 'NONE',
-  '{QWORD}': Template.info % 'QWORD',
-  '{REG_QWORD}': Template.info % 'QWORD',
-  '{QWORD_LITTLE_ENDIAN}': Template.info % 'QWORD_LITTLE_ENDIAN',
-  '{REG_QWORD_LITTLE_ENDIAN}': Template.info % 'QWORD_LITTLE_ENDIAN',
-
-  # GPO
-  '{ENTERPRISE}': Template.dark % 'ENTERPRISE',
-  '{EDU}': Template.dark % 'EDU',
-  '{PRO}': Template.dark % 'PRO',
-  '{HOME}': Template.dark % 'HOME',
-
-  # Networking
-  '{IP}': Template.info % 'IP',
-  '{!IP}': Template.info % '!IP',
-  '{IP_PUB_MASK}': '%s / %s' % (Template.info % 'PUBLIC IP', Template.info % 'NETMASK'),
-  '{IP_PUB_CIDR}': '%s / %s' % (Template.info % 'PUBLIC IP', Template.info % 'CIDR'),
-  '{IP_CIDR}': '%s / %s' % (Template.info % 'IP', Template.info % 'CIDR'),
-  '{IP_NET_CIDR}': '%s / %s' % (Template.info % 'IP NET', Template.info % 'CIDR'),
-  '{IP_RANGE}': Template.info % 'IP RANGE',
-  '{GATEWAY}': Template.info % 'GATEWAY',
-  '{NETWORK}': Template.info % 'NETWORK',
-  '{SSH_PORT}': Template.info % 'SSH PORT',
-  '{STATIC}': Template.info % 'STATIC',
-  '{DHCP}': Template.info % 'DHCP',
-  '{HTTPS}': Template.info % 'HTTPS',
-  '{HTTP}': Template.info % 'HTTP',
-
-  # Networking / DNS
-  '{HOST}': Template.info % 'HOST',
-  '{LOCALHOST}': Template.info % 'LOCALHOST',
-  '{FQDN}': Template.info % 'FQDN',
-  '{ALIAS}': Template.info % 'ALIAS',
-  '{DOMAIN}': Template.info % 'DOMAIN',
-  '{PUBLIC_DNS}': Template.warning % 'PUBLIC DNS',
-  '{INTERNAL_DNS}': Template.info % 'INTERNAL DNS',
-
-  # Networking / Wifi
-  '{SITE}': Template.info % 'SITE',
-  '{SSID}': Template.info % 'SSID',
-  '{CONTROLLER}': Template.info % 'CONTROLLER',
-
-  # Networking / Firewall
-  '{PUBLIC}': Template.warning % 'PUBLIC',
-  '{PRIVATE}': Template.info % 'PRIVATE',
-  '{EXPOSED}': Template.warning % 'EXPOSED',
-  '{RESTRICTED}': Template.info % 'RESTRICTED',
-  '{TCP}': Template.info % 'TCP',
-  '{UDP}': Template.info % 'UDP',
-  '{TCP/UDP}': Template.info % 'TCP/UDP',
-
-  # Networking / VLANs
-  '{UPSTREAM_SWITCH}': Template.info % 'UPSTREAM SWITCH',
-  '{DOWNSTREAM_SWITCH}': Template.info % 'DOWNSTREAM SWITCH',
-  '{EXPECTED_SWITCH}': Template.info % 'EXPECTED SWITCH',
-  '{EXPECTED_SWITCH_PORT_PROFILE}': Template.info % 'EXPECTED SWITCH PORT PROFILE',
-  '{WIFI}': Template.info % 'WIFI',
-  '{LOCAL}': Template.info % 'LOCAL',
-  '{INTERFACE}': Template.info % 'INTERFACE',
-  '{IN}': Template.info % 'IN',
-  '{OUT}': Template.info % 'OUT',
-
-  # Logging
-  '{INFO}': Template.info % 'INFO',
-
-  # Labels
-  '{CAPTIVE_DNS_NAME}': '%s Captive DNS' % Template.info % 'NETWORK',
-  '{CAPTIVE_DNS_EXCEPTIONS}': '%s Captive DNS Exceptions' % Template.info % 'NETWORK',
-  '{DNAT_EXCEPTION_NAME}': '%s-dnat-exception-group' % Template.info % 'NETWORK',
-}
+def ref_node(ref):
+  """Return a reference badge node, as rendered by Template.ref.
+
+  Args:
+    ref: String reference URI.
+
+  Returns:
+    nodes.reference containing the reference badge.
+  """
+  node = nodes.reference(refuri=ref, classes=['sphinx-bs', 'badge', 'badge-info', 'badge-pill'])
+  node += nodes.inline('Reference', 'Reference')
+  return node
+
+def update_node(text):
+  """Return an update badge node, as rendered by update().
+
+  Args:
+    text: String datetime last time references/settings were checked.
+
+  Returns:
+    nodes.inline containing the update badge.
+  """
+  text = 'Updated: %s' % text or 'Never'
+  return nodes.inline(text, text, classes=['sphinx-bs', 'badge', 'badge-secondary', 'badge-pill'])
+
+def _build():
+  """Build the badge table: token: rst badge definition."""
+  return {
+    # Account / Authorization
+    '{USER}': Template.info % 'USER',
+    '{PASS}': Template.info % 'PASS',
+    '{EMAIL}': Template.info % 'EMAIL',
+    '{TOKEN}': Template.info % 'TOKEN',
+    '{KEY}': Template.info % 'KEY',
+    '{SID}': Template.info % 'SID',
+    '{UUID}': Template.info % 'UUID',
+
+    # Options
+    '{ON}': Template.success % 'ON',
+    '{OFF}': Template.danger % 'OFF',
+    '{YES}': Template.success % 'YES',
+    '{NO}': Template.danger % 'NO',
+    '{ACTIVE}': Template.success % 'ACTIVE',
+    '{ACCEPT}': Template.success % 'ACCEPT',
+    '{DROP}': Template.danger % 'DROP',
+    '{DISABLE}': Template.danger % 'DISABLE',
+    '{DISABLED}': Template.danger % 'DISABLED',
+    '{ENABLED}': Template.success % 'ENABLED',
+    '{ENABLE}': Template.success % 'ENABLE',
+    '{ENTER}': Template.info % 'ENTER',
+    '{ANY}': Template.info % 'ANY',
+    '{SUCCESS}': Template.success % 'SUCCESS',
+    '{FAILURE}': Template.danger % 'FAILURE',
+    '{EMPTY}': Template.danger % 'EMPTY',
+    '{BLOCK}': Template.danger % 'BLOCK',
+
+    # Location / Time
+    '{TZ}': Template.info % 'TZ',
+    '{COUNTRY}': Template.info % 'COUNTRY',
+
+    # Descriptors / Actions
+    '{ADD}': Template.success % 'ADD',
+    '{DELETE}': Template.danger % 'DELETE',
+    '{DESCRIPTION}': Template.info % 'DESCRIPTION',
+    '{OPTIONAL}': Template.info % 'OPTIONAL',
+    '{DRIVE}': Template.info % 'DRIVE',
+    '{LMB}': Template.info % '🖯',
+    '{MMB}': Template.info % '🖰',
+    '{RMB}': Template.info % '🖱',
+
+    # Services
+    '{STARTED}': Template.success % 'STARTED',
+    '{STOPPED}': Template.danger % 'STOPPED',
+    '{AUTOMATIC}': Template.info % 'AUTOMATIC',
+
+    # Regedit
+    '{DWORD}': Template.info % 'DWORD',
+    '{REG_DWORD}': Template.info % 'DWORD',
+    '{SZ}': Template.info % 'SZ',
+    '{REG_SZ}': Template.info % 'SZ',
+    '{BINARY}': Template.info % 'BINARY',
+    '{REG_BINARY}': Template.info % 'BINARY',
+    '{DWORD_LITTLE_ENDIAN}': Template.info % 'DWORD_LITTLE_ENDIAN',
+    '{REG_DWORD_LITTLE_ENDIAN}': Template.info % 'DWORD_LITTLE_ENDIAN',
+    '{DWORD_BIG_ENDIAN}': Template.info % 'DWORD_BIG_ENDIAN',
+    '{REG_DWORD_BIG_ENDIAN}': Template.info % 'DWORD_BIG_ENDIAN',
+    '{EXPAND_SZ}': Template.info % 'EXPAND_SZ',
+    '{REG_EXPAND_SZ}': Template.info % 'EXPAND_SZ',
+    '{LINK}': Template.info % 'LINK',
+    '{REG_LINK}': Template.info % 'LINK',
+    '{MULTI_SZ}': Template.info % 'MULTI_SZ',
+    '{REG_MULTI_SZ}': Template.info % 'MULTI_SZ',
+    '{NONE}': Template.info % 'NONE',
+    '{REG_NONE}': Template.info % 'NONE',
+    '{QWORD}': Template.info % 'QWORD',
+    '{REG_QWORD}': Template.info % 'QWORD',
+    '{QWORD_LITTLE_ENDIAN}': Template.info % 'QWORD_LITTLE_ENDIAN',
+    '{REG_QWORD_LITTLE_ENDIAN}': Template.info % 'QWORD_LITTLE_ENDIAN',
+    '{RESOURCE_LIST}': Template.info % 'RESOURCE_LIST',
+    '{REG_RESOURCE_LIST}': Template.info % 'RESOURCE_LIST',
+    '{FULL_RESOURCE_DESCRIPTOR}': Template.info % 'FULL_RESOURCE_DESCRIPTOR',
+    '{REG_FULL_RESOURCE_DESCRIPTOR}': Template.info % 'FULL_RESOURCE_DESCRIPTOR',
+    '{RESOURCE_REQUIREMENTS_LIST}': Template.info % 'RESOURCE_REQUIREMENTS_LIST',
+    '{REG_RESOURCE_REQUIREMENTS_LIST}': Template.info % 'RESOURCE_REQUIREMENTS_LIST',
+
+    # GPO
+    '{ENTERPRISE}': Template.dark % 'ENTERPRISE',
+    '{EDU}': Template.dark % 'EDU',
+    '{PRO}': Template.dark % 'PRO',
+    '{HOME}': Template.dark % 'HOME',
+
+    # Networking
+    '{IP}': Template.info % 'IP',
+    '{!IP}': Template.info % '!IP',
+    '{IP_PUB_MASK}': '%s / %s' % (Template.info % 'PUBLIC IP', Template.info % 'NETMASK'),
+    '{IP_PUB_CIDR}': '%s / %s' % (Template.info % 'PUBLIC IP', Template.info % 'CIDR'),
+    '{IP_CIDR}': '%s / %s' % (Template.info % 'IP', Template.info % 'CIDR'),
+    '{IP_NET_CIDR}': '%s / %s' % (Template.info % 'IP NET', Template.info % 'CIDR'),
+    '{IP_RANGE}': Template.info % 'IP RANGE',
+    '{GATEWAY}': Template.info % 'GATEWAY',
+    '{NETWORK}': Template.info % 'NETWORK',
+    '{SSH_PORT}': Template.info % 'SSH PORT',
+    '{STATIC}': Template.info % 'STATIC',
+    '{DHCP}': Template.info % 'DHCP',
+    '{HTTPS}': Template.info % 'HTTPS',
+    '{HTTP}': Template.info % 'HTTP',
+
+    # Networking / DNS
+    '{HOST}': Template.info % 'HOST',
+    '{LOCALHOST}': Template.info % 'LOCALHOST',
+    '{FQDN}': Template.info % 'FQDN',
+    '{ALIAS}': Template.info % 'ALIAS',
+    '{DOMAIN}': Template.info % 'DOMAIN',
+    '{PUBLIC_DNS}': Template.warning % 'PUBLIC DNS',
+    '{INTERNAL_DNS}': Template.info % 'INTERNAL DNS',
+
+    # Networking / Wifi
+    '{SITE}': Template.info % 'SITE',
+    '{SSID}': Template.info % 'SSID',
+    '{CONTROLLER}': Template.info % 'CONTROLLER',
+
+    # Networking / Firewall
+    '{PUBLIC}': Template.warning % 'PUBLIC',
+    '{PRIVATE}': Template.info % 'PRIVATE',
+    '{EXPOSED}': Template.warning % 'EXPOSED',
+    '{RESTRICTED}': Template.info % 'RESTRICTED',
+    '{TCP}': Template.info % 'TCP',
+    '{UDP}': Template.info % 'UDP',
+    '{TCP/UDP}': Template.info % 'TCP/UDP',
+
+    # Networking / VLANs
+    '{UPSTREAM_SWITCH}': Template.info % 'UPSTREAM SWITCH',
+    '{DOWNSTREAM_SWITCH}': Template.info % 'DOWNSTREAM SWITCH',
+    '{EXPECTED_SWITCH}': Template.info % 'EXPECTED SWITCH',
+    '{EXPECTED_SWITCH_PORT_PROFILE}': Template.info % 'EXPECTED SWITCH PORT PROFILE',
+    '{WIFI}': Template.info % 'WIFI',
+    '{LOCAL}': Template.info % 'LOCAL',
+    '{INTERFACE}': Template.info % 'INTERFACE',
+    '{IN}': Template.info % 'IN',
+    '{OUT}': Template.info % 'OUT',
+
+    # Logging
+    '{INFO}': Template.info % 'INFO',
+
+    # Labels
+    '{CAPTIVE_DNS_NAME}': '%s Captive DNS' % Template.info % 'NETWORK',
+    '{CAPTIVE_DNS_EXCEPTIONS}': '%s Captive DNS Exceptions' % Template.info % 'NETWORK',
+    '{DNAT_EXCEPTION_NAME}': '%s-dnat-exception-group' % Template.info % 'NETWORK',
+  }
+
+_badges = None
+
+# Badges from ct_badges, token: String rst badge definition.
+_custom = {}
+
+def table():
+  """Return the badge table, built on first use.
+
+  Returns:
+    Dictionary of String token: String rst badge definition, including
+    ct_badges.
+  """
+  global _badges
+  if _badges is None:
+    _badges = _build()
+    _badges.update(_custom)
+  return _badges
+
+def __getattr__(name):
+  # badges.badges is built on first access.
+  if name == 'badges':
+    return table()
+  raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+def _plain(match):
+  token = match.group(0)
+  return token[1:-1] if token in table() else token
+
+def plain(text):
+  """Reduce every badge token in text to its plain token value.
+
+  Args:
+    text: String text containing badge tokens, e.g. 'Set {ON} for {HTTPS}'.
+
+  Returns:
+    String text with known badge tokens replaced with the token name, e.g.
+    'Set ON for HTTPS'.
+  """
+  if '{' not in text:
+    return text
+  return TOKEN_RE.sub(_plain, text)
+
+def strip(text, used=None):
+  """Remove every known badge token from text.
+
+  Args:
+    text: String text containing badge tokens, e.g. 'Set {ON} for {HTTPS}'.
+    used: Set to add every token in text to, including unknown tokens, or
+        None. Default: None.
+
+  Returns:
+    String text without known badge tokens, e.g. 'Set  for '. Unknown tokens
+    are left as is.
+  """
+  if '{' not in text:
+    return text
+  known = table()
+  result = []
+  start = 0
+  for match in TOKEN_RE.finditer(text):
+    token = match.group(0)
+    if used is not None:
+      used.add(token)
+    if token in known:
+      result.append(text[start:match.start()])
+      start = match.end()
+  result.append(text[start:])
+  return ''.join(result)
+
+def _render(rst):
+  """Render a badge definition to nodes, as rendered by the :badge: role.
+
+  Args:
+    rst: String badge definition from badges.badges.
+
+  Returns:
+    List of nodes.Node rendering the badge.
+  """
+  result = []
+  start = 0
+  for match in ROLE_RE.finditer(rst):
+    if match.start() > start:
+      result.append(nodes.Text(rst[start:match.start()]))
+    text, _, classes = match.group(1).rpartition(',')
+    result.append(nodes.inline(match.group(0), text,
+                               classes=['sphinx-bs', 'badge'] + classes.split()))
+    start = match.end()
+  if start < len(rst):
+    result.append(nodes.Text(rst[start:]))
+  return result
+
+# Badge nodes rendered on first use, token: List of nodes.Node.
+_prototypes = {}
+
+# Incremented whenever prototypes are cleared, so callers caching rendered
+# badges (e.g. cmdmenu) can key on it.
+generation = 0
+
+def reset(app=None):
+  """Clear rendered badge prototypes.
+
+  Connected to builder-inited.
+  """
+  global generation
+  _prototypes.clear()
+  generation += 1
+
+def node(token):
+  """Render a badge token to nodes.
+
+  Args:
+    token: String badge token, e.g. '{ON}'.
+
+  Returns:
+    List of nodes.Node copied from the badge prototype. None if token is not
+    a badge.
+  """
+  try:
+    prototype = _prototypes[token]
+  except KeyError:
+    rst = table().get(token)
+    if rst is None:
+      return None
+    prototype = _prototypes[token] = _render(rst)
+  return [n.deepcopy() for n in prototype]
+
+def _text(text):
+  return [nodes.Text(text)]
+
+def text_nodes(text, render=_text, used=None):
+  """Render text to nodes, replacing every badge token with badge nodes.
+
+  Args:
+    text: String text containing badge tokens.
+    render: Callable rendering a String of text between badges to a List of
+        nodes.Node. Default: nodes.Text.
+    used: Set to add every token in text to, including unknown tokens, or
+        None. Default: None.
+
+  Returns:
+    List of nodes.Node containing text and badges.
+  """
+  if '{' not in text:
+    return render(text)
+  result = []
+  start = 0
+  for match in TOKEN_RE.finditer(text):
+    if used is not None:
+      used.add(match.group(0))
+    badge = node(match.group(0))
+    if badge is None:
+      continue
+    if match.start() > start:
+      result.extend(render(text[start:match.start()]))
+    result.extend(badge)
+    start = match.end()
+  if start < len(text) or not result:
+    result.extend(render(text[start:]))
+  return result
+
+def config_inited(app, config):
+  global _badges
+  _custom.clear()
+  for token, rst in config.ct_badges.items():
+    if not token.startswith('{'):
+      token = '{%s}' % token
+    if MARKUP_RE.search(ROLE_RE.sub('', rst)):
+      logger.warning('ct_badges: %s: only :badge: roles and plain text are '
+                     'supported, ignoring %r', token, rst)
+      continue
+    _custom[token] = rst
+  _badges = None
+
+def _usage(env):
+  try:
+    return env.ct_badge_usage
+  except AttributeError:
+    env.ct_badge_usage = {}
+    return env.ct_badge_usage
+
+def note(env, tokens):
+  """Record badge tokens used by the document being read.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    tokens: Iterable of String badge tokens.
+  """
+  if tokens:
+    usage = _usage(env)
+    usage[env.docname] = usage.get(env.docname, frozenset()).union(tokens)
+
+def env_purge_doc(app, env, docname):
+  _usage(env).pop(docname, None)
+
+def env_merge_info(app, env, docnames, other):
+  usage = _usage(env)
+  other = _usage(other)
+  for docname in docnames:
+    if docname in other:
+      usage[docname] = other[docname]
+
+def env_get_outdated(app, env, added, changed, removed):
+  """Re-read documents using ct_badges tokens changed since the last build."""
+  previous = getattr(env, 'ct_badge_definitions', None)
+  env.ct_badge_definitions = dict(_custom)
+  if previous is None:
+    return []
+  tokens = {t for t in previous.keys() | _custom.keys()
+            if previous.get(t) != _custom.get(t)}
+  if not tokens:
+    return []
+  return [docname for docname, used in _usage(env).items()
+          if docname not in removed and not tokens.isdisjoint(used)]
+
+def setup(app):
+  app.add_config_value('ct_badges', {}, '')
+  app.connect('config-inited', config_inited)
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('env-merge-info', env_merge_info)
+  app.connect('env-get-outdated', env_get_outdated)
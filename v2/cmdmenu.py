@@ -5,26 +5,43 @@
 #      https://github.com/sphinx-doc/sphinx/blob/master/sphinx/roles.py#L382
 #
 #    conf.py options:
-#      ms_cmdmenu_separator: Unicode separator to use for GUI menuselection.
+#      ct_cmdmenu_separator: Unicode separator to use for GUI menuselection.
 #          If defined outside the default value, this will take precedence over
 #          `ct_separator`. Default: '\N{TRIANGULAR BULLET}'.
-#      ms_cmdmenu_separator_replace: String to replace with the cmdmenu
+#      ct_cmdmenu_separator_replace: String to replace with the cmdmenu
 #          separator. If defined outside the default value, this will take
 #          precedence over `ct_separator_replace`. Default: '-->'.
-#      ms_cmdmenu_replace_use_space: Boolean True to insert a single space
+#      ct_cmdmenu_replace_use_space: Boolean True to insert a single space
 #          before and after the unicode separator, trimming existing whitespace
 #          as needed. False: leaves whitespace as is. Default: True.
 
+import re
+import functools
 from .. import config
+from .. import timing
+from . import badges
 from docutils import nodes
-from docutils.parsers.rst import roles
 from sphinx.util.docutils import SphinxRole
 
-def gen_menu(text, sep, rep, space=True):
-  """Generate menuselection role with specified options.
+# Maximum number of rendered menus kept, see gen_menu().
+CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=None)
+def _pattern(rep):
+  """Compile the token pattern for a separator replacement string.
+
+  Matches, in order of precedence: rep, '&&' escapes and '&'.
+  """
+  return re.compile('(%s)|(&&)|&' % re.escape(rep))
+
+def tokenize(text, sep, rep, space=True):
+  """Tokenize menu text in a single pass.
+
+  Replaces rep with sep, unescapes '&&' and splits on '&' accelerators ('&'
+  not followed by whitespace, '&', a separator or the end of text).
 
   Args:
-    text: Unicode text to generate.
+    text: Unicode text to tokenize.
     sep: Unicode menu separator to use.
     rep: String separator replacement to use.
     space: Boolean True to insert a single space before and after the unicode
@@ -32,26 +49,95 @@ def gen_menu(text, sep, rep, space=True):
         whitespace as is. Default: True.
 
   Returns:
-    List[nodes.Node] containing the rendered menuselection with custom
-    separator.
+    Tuple of (String menu text with separators, List of (String accelerator
+    letter, String text) Tuples). The first letter is always ''.
   """
   if space:
     sep = ' %s ' % sep
-    menu_text = sep.join(map(lambda x: x.strip(), text.split(rep)))
-  else:
-    menu_text = text.replace(rep, sep)
-  menu_node = nodes.inline(rawtext=menu_text, classes=['guilabel'])
-  spans = config.AMP_RE.split(menu_text)
-  menu_node += nodes.Text(spans.pop(0))
+  menu = []
+  pieces = []
+  spans = [('', pieces)]
+  lstrip = space
+  start = 0
+  for match in _pattern(rep).finditer(text):
+    i = match.start()
+    accelerator = match.group(1) is None and match.group(2) is None
+    if accelerator and (i + 1 == len(text) or text[i + 1].isspace() or
+                        text.startswith(rep, i + 1) or (i and text[i - 1] == '&')):
+      continue
+    chunk = text[start:i]
+    if lstrip:
+      chunk = chunk.lstrip()
+      lstrip = False
+    if match.group(1) is not None:
+      if space:
+        chunk = chunk.rstrip()
+        lstrip = True
+      menu.extend((chunk, sep))
+      pieces.extend((chunk, sep))
+      start = match.end()
+    elif match.group(2):
+      menu.extend((chunk, '&&'))
+      pieces.extend((chunk, '&'))
+      start = match.end()
+    else:
+      letter = text[i + 1]
+      menu.extend((chunk, '&', letter))
+      pieces.append(chunk)
+      pieces = []
+      spans.append((letter, pieces))
+      start = i + 2
+  chunk = text[start:]
+  if lstrip:
+    chunk = chunk.lstrip()
+  if space:
+    chunk = chunk.rstrip()
+  menu.append(chunk)
+  pieces.append(chunk)
+  return ''.join(menu), [(letter, ''.join(p)) for letter, p in spans]
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _render(text, sep, rep, space, generation):
+  """Render a menu, cached per badge generation (see badges.reset).
 
-  for span in spans:
-    span = span.replace('&&', '&')
-    letter = nodes.Text(span[0])
-    accelerator = nodes.inline('', '', letter, classes=['accelerator'])
+  Returns:
+    Tuple of (nodes.inline rendered menu, frozenset of String badge tokens).
+  """
+  used = set()
+  menu_text, spans = tokenize(text, sep, rep, space)
+  menu_node = nodes.inline(rawtext=menu_text, classes=['guilabel'])
+  menu_node.extend(badges.text_nodes(spans[0][1], used=used))
+  for letter, span in spans[1:]:
+    accelerator = nodes.inline('', '', nodes.Text(letter), classes=['accelerator'])
     menu_node += accelerator
-    menu_node += nodes.Text(span[1:])
+    menu_node.extend(badges.text_nodes(span, used=used))
+  return menu_node, frozenset(used)
+
+def gen_menu(text, sep, rep, space=True, used=None):
+  """Generate menuselection role with specified options.
+
+  Rendered menus are kept in a bounded LRU cache keyed on (text, sep, rep,
+  space); each use is a copy of the cached nodes.
 
-  return menu_node
+  Args:
+    text: Unicode text to generate.
+    sep: Unicode menu separator to use.
+    rep: String separator replacement to use.
+    space: Boolean True to insert a single space before and after the unicode
+        separator, trimming existing whitespace as needed. False: leaves
+        whitespace as is. Default: True.
+    used: Set to add badge tokens in text to, or None. Default: None.
+
+  Badges ({KEYWORD}) are automatically converted using badges.badges.
+
+  Returns:
+    List[nodes.Node] containing the rendered menuselection with custom
+    separator.
+  """
+  menu_node, tokens = _render(text, sep, rep, space, badges.generation)
+  if used is not None:
+    used.update(tokens)
+  return menu_node.deepcopy()
 
 
 class CmdMenu(SphinxRole):
@@ -61,32 +147,29 @@ class CmdMenu(SphinxRole):
     Role for menuselection with custom separator.
 
   conf.py options:
-    ms_cmdmenu_separator: Unicode separator to use for GUI menuselection.
+    ct_cmdmenu_separator: Unicode separator to use for GUI menuselection.
         If defined outside the default value, this will take precedence over
         `ct_separator`. Default: '\N{TRIANGULAR BULLET}'.
-    ms_cmdmenu_separator_replace: String to replace with the cmdmenu
+    ct_cmdmenu_separator_replace: String to replace with the cmdmenu
         separator. If defined outside the default value, this will take
         precedence over `ct_separator_replace`. Default: '-->'.
-    ms_cmdmenu_replace_use_space: Boolean True to insert a single space
+    ct_cmdmenu_replace_use_space: Boolean True to insert a single space
         before and after the unicode separator, trimming existing whitespace
         as needed. False: leaving whitespace as is. Default: True.
   """
 
-  def run(self):
-    sep = config.get_sep(
-        self.inliner.document.settings.env.config.ct_cmdmenu_separator,
-        self.inliner.document.settings.env.config.ct_separator)
+  def _run(self, timer):
+    with timer.phase('sanitize'):
+      settings = config.settings('cmdmenu')
 
-    rep = config.get_rep(
-        self.inliner.document.settings.env.config.ct_cmdmenu_separator_replace,
-        self.inliner.document.settings.env.config.ct_separator_replace)
+    used = set()
+    with timer.phase('render'):
+      menu = gen_menu(self.text, settings.sep, settings.rep, settings.space, used)
+    badges.note(self.env, used)
+    return [menu], []
 
-    return [gen_menu(self.text, sep, rep)], []
-
-
-def setup(app):
-  app.add_config_value('ct_cmdmenu_separator', config.DEFAULT_SEPARATOR, '')
-  app.add_config_value('ct_cmdmenu_separator_replace', config.DEFAULT_REPLACE, '')
-  app.add_config_value('ct_cmdmenu_replace_use_space', True, '')
-
-  roles.register_local_role('cmdmenu', CmdMenu())
+  def run(self):
+    profiler = timing.get()
+    if profiler:
+      return profiler.call(self.name, self.env.docname, self.lineno, self._run)
+    return self._run(timing.NULL_TIMER)
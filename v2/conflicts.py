@@ -0,0 +1,134 @@
+# Cross document port conflict detection.
+#
+# Ports rows from the project index (see index.py) are checked once all
+# documents are read. Port ranges (e.g. '8000-8100') are grouped by protocol
+# and swept in port order into clusters of overlapping ports, so N ports are
+# checked in O(N log N) instead of comparing every pair. Each cluster claimed
+# by more than one ports table is reported as a single warning naming every
+# table location. Overlapping ports within a single table are not conflicts.
+#
+# conf.py options:
+#   ct_ports_conflicts: Boolean True to warn about ports claimed by more than
+#       one ports table. Default: True.
+
+import re
+from sphinx.util import logging
+from .. import index
+
+logger = logging.getLogger(__name__)
+
+# Delimiters between ports in a port cell, e.g. '80, 443' or '80; 443'.
+ITEM_RE = re.compile(r'[,;]')
+
+# Port, or port range, leading an item of a port cell, e.g. '32400',
+# '8000-8100', '443 (HTTP/2)'. Text following the port is ignored.
+PORT_RE = re.compile(r'\s*(\d+)(?:\s*[-–]\s*(\d+))?')
+
+# Protocols in a protocol cell, e.g. '{TCP}', '{TCP/UDP}'.
+PROTOCOL_RE = re.compile(r'[A-Za-z0-9]+')
+
+MAX_PORT = 65535
+
+def _ranges(text):
+  """Parse a port cell to port ranges.
+
+  Args:
+    text: String port cell.
+
+  Returns:
+    List of (Integer low, Integer high) Tuples, one for each ',' or ';'
+    delimited item starting with a port or port range. Annotations following
+    the port (e.g. '443 (HTTP/2)'), items without a leading port and ports
+    outside 0-65535 are ignored.
+  """
+  ranges = []
+  for item in ITEM_RE.split(text):
+    match = PORT_RE.match(item)
+    if not match:
+      continue
+    low = int(match.group(1))
+    high = int(match.group(2) or low)
+    if low > high:
+      low, high = high, low
+    if high <= MAX_PORT:
+      ranges.append((low, high))
+  return ranges
+
+def intervals(env):
+  """Collect port intervals from every ports table in the project index.
+
+  Args:
+    env: sphinx BuildEnvironment.
+
+  Returns:
+    Dictionary of String protocol: List of (Integer low, Integer high,
+    String port, String docname, Integer line, String title) Tuples.
+  """
+  protocols = {}
+  for docname, record in index.records(env, 'ports'):
+    for _, rows in record.groups:
+      for row in rows:
+        if not row:
+          continue
+        names = PROTOCOL_RE.findall(row[1].upper()) if len(row) > 1 else []
+        for low, high in _ranges(row[0]):
+          for protocol in names or ['']:
+            protocols.setdefault(protocol, []).append(
+                (low, high, row[0], docname, record.line, record.title))
+  return protocols
+
+def _tables(cluster):
+  """Return the number of tables (docname, line) in a cluster."""
+  return len({entry[3:5] for entry in cluster})
+
+def conflicts(entries):
+  """Find clusters of overlapping port intervals for a single protocol.
+
+  Intervals are swept in order of their low port; a cluster is extended while
+  the next interval starts at or below the highest port in the cluster.
+
+  Args:
+    entries: List of interval Tuples, see intervals().
+
+  Yields:
+    List of overlapping interval Tuples in port order, claimed by at least
+    two tables. Clusters within a single table are ignored.
+  """
+  cluster = []
+  high = -1
+  for entry in sorted(entries):
+    if entry[0] > high:
+      if _tables(cluster) > 1:
+        yield cluster
+      cluster = []
+    cluster.append(entry)
+    high = max(high, entry[1])
+  if _tables(cluster) > 1:
+    yield cluster
+
+def _warn(env, protocol, cluster):
+  """Warn once about a cluster of overlapping ports, naming every table."""
+  tables = {}
+  for _, _, port, docname, line, title in cluster:
+    ports = tables.setdefault((docname, line), (title, []))[1]
+    if port not in ports:
+      ports.append(port)
+  claims = []
+  for (docname, line), (title, ports) in sorted(tables.items()):
+    claims.append("%s in '%s' (%s:%s)" % (', '.join(ports), title,
+                                          env.doc2path(docname), line))
+  logger.warning('ports%s claimed by %d tables: %s',
+                 '/%s' % protocol if protocol else '', len(tables),
+                 '; '.join(claims), location=min(tables), type='ct',
+                 subtype='ports')
+
+def env_check_consistency(app, env):
+  if not app.config.ct_ports_conflicts:
+    return
+  for protocol, entries in sorted(intervals(env).items()):
+    for cluster in conflicts(entries):
+      _warn(env, protocol, cluster)
+
+def setup(app):
+  app.add_config_value('ct_ports_conflicts', True, '')
+  app.connect('env-check-consistency', env_check_consistency)
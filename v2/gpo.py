@@ -1,12 +1,8 @@
 # gpo config table.
 
-from .. import config
 from .. import ct
-from . import badges
-from docutils import nodes
-from docutils.statemachine import ViewList
+from . import admx
 from docutils.parsers.rst import directives
-from sphinx.util.nodes import nested_parse_with_titles
 
 
 class Gpo(ct.AbstractConfigTable):
@@ -15,8 +11,13 @@ class Gpo(ct.AbstractConfigTable):
   Badges ({KEYWORD}) are automatically converted using badges.badges.
 
   Directives:
-    :path:         String registry key path. Required.
+    :path:         String registry key path. Required unless :policy: is used.
+    :policy:       String policy name to look up in ct_gpo_policy_definitions,
+                   optionally qualified with the ADMX namespace. Sets :path:
+                   and :version: if not given, and adds registry value rows.
     :value{0..30}: List of Option, Setting strings for policy.
+    :values:       Option, Setting rows, one per line. Unlimited rows.
+    :source:       CSV/TSV/JSON/YAML file of Option, Setting rows.
     :ref:          List of reference URI's.
     :version:      List of supported windows versions - see self._text_badges.
     :update:       String datetime last time references/settings were checked.
@@ -33,6 +34,9 @@ class Gpo(ct.AbstractConfigTable):
     ct_gpo_separator_replace: String separator to replace with
         ct_{CLASS}_separator.
         Default: '-->'.
+    ct_gpo_policy_definitions: String PolicyDefinitions directory of ADMX
+        files, relative to the configuration directory. Default: None.
+    ct_gpo_policy_language: String ADML language directory. Default: 'en-US'.
 
   Examples:
     .. gpo::    Enable logon logoff events policy policy
@@ -54,14 +58,23 @@ class Gpo(ct.AbstractConfigTable):
 
       .. info::
         Additional rst can be used here.
+
+    .. gpo::    Disable autoplay
+      :policy:  NoAutoplayfornonVolume
+      :value0:  ☑, Enabled
+
+      Path, supported versions and registry values from the policy definition.
   """
   required_arguments = 1
   optional_arguments = 0
   final_argument_whitespace = True
   has_content = True
   add_index = True
+  label = 'GPO'
+  widths = (6, 6)
   option_spec = {
     'path': directives.unchanged_required,
+    'policy': directives.unchanged_required,
     'value0': directives.unchanged,
     'value1': directives.unchanged,
     'value2': directives.unchanged,
@@ -93,6 +106,8 @@ class Gpo(ct.AbstractConfigTable):
     'value28': directives.unchanged,
     'value29': directives.unchanged,
     'value30': directives.unchanged,
+    'values': directives.unchanged,
+    'source': directives.path,
     'ref': directives.unchanged,
     'version': directives.unchanged,
     'update': directives.unchanged,
@@ -101,123 +116,101 @@ class Gpo(ct.AbstractConfigTable):
     'generic': directives.flag,
   }
 
-  def __init__(self, *args, **kwargs):
-    super().__init__(*args, **kwargs)
-    self.sep = config.get_sep(
-      self.state.document.settings.env.config.ct_gpo_separator,
-      self.state.document.settings.env.config.ct_separator)
-    self.rep = config.get_rep(
-      self.state.document.settings.env.config.ct_gpo_separator_replace,
-      self.state.document.settings.env.config.ct_separator_replace)
+  def _sanitize_policy(self):
+    """Look up :policy: in the policy definition index.
 
-  def _sanitize_version(self):
-    """Returned sanitized List of supported versions."""
-    if 'version' in self.options:
-      return self._parse_list('version')
-    return None
-
-  def _add_value_row(self, data):
-    """Add RST row for :value: directive.
-
-    Args:
-      data: List of strings to render to row.
+    Returns:
+      admx.Policy or None.
     """
-    for x in data:
-      self._rst.append("    ---", self.c)
-      self._rst.append("    :column: col-md-6", self.c)
-      self._rst.append("    %s" % repr(x)[1:-1], self.c)
-
-  def _add_dropdown_header(self):
-    if 'generic' in self.options:
-      self._rst.append(".. dropdown:: GPO", self.c)
-      self._rst.append("  :title: font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
-    else:
-      self._rst.append(".. dropdown:: %s" % self.title.astext(), self.c)
-      self._rst.append("  :container: + shadow", self.c)
-      self._rst.append("  :title: bg-primary text-white font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
-
-    if 'open' in self.options:
-      self._rst.append("  :open:", self.c)
-
-  def _add_panel_template(self):
-    self._rst.append("", self.c)
-    self._rst.append("  .. panels::", self.c)
-    self._rst.append("    :container: container-lg pb-3", self.c)
-    self._rst.append("    :column: col-lg-4 col-md-4 col-sm-6 col-xs-12 p-0 m-0", self.c)
-    self._rst.append("    :card: border-0", self.c)
-    self._rst.append("", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    for line in self.content:
-      self._rst.append("    %s" % line, self.c)
-
-  def _add_path(self, path):
-    """Add RST row for :path: directive.
+    if 'policy' not in self.options:
+      return None
+    env = self.state.document.settings.env
+    if not env.config.ct_gpo_policy_definitions:
+      raise self.error(':policy: requires ct_gpo_policy_definitions')
+    with self._timer.phase('sanitize'):
+      try:
+        policy = admx.index.get(self.options['policy'])
+      except KeyError as e:
+        raise self.error(e.args[0])
+    return policy
+
+  def _note_dependencies(self):
+    """Note :source: and :policy: definition files as dependencies."""
+    super()._note_dependencies()
+    if 'policy' in self.options:
+      env = self.state.document.settings.env
+      try:
+        policy = admx.index.get(self.options['policy'])
+      except KeyError:
+        return
+      for path in policy.files:
+        env.note_dependency(path)
+
+  def _policy_rows(self, policy):
+    """Generate registry value rows for a policy.
 
     Args:
-      path: String to render to row.
-    """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0 font-weight-bold", self.c)
-    self._rst.append("    :body: bg-light", self.c)
-    # repr is used to auto-escape strings for rendering in sudo-rst (e.g. \\)
-    # returns quoted, so strip quotes to ensure render correctly.
-    self._rst.append("    %s" % repr(path)[1:-1], self.c)
-
-  def _add_update(self, update):
-    """Add RST row for :update: directive.
+      policy: admx.Policy to generate rows for.
 
-    Args:
-      update: String update time to render to row.
+    Returns:
+      List of Tuples containing registry key, value and element rows.
     """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    self._rst.append("    :body: text-right", self.c)
-    self._rst.append("    %s" % badges.update(update), self.c)
+    hive = admx.CLASSES.get(policy.cls, admx.CLASSES['Machine'])[1]
+    rows = [('Registry', '%s\\%s' % (hive, policy.key))]
+    if policy.value:
+      settings = []
+      if policy.enabled is not None:
+        settings.append('{ENABLED} %s' % policy.enabled)
+      if policy.disabled is not None:
+        settings.append('{DISABLED} %s' % policy.disabled)
+      rows.append((policy.value, ', '.join(settings)))
+    for kind, key, value in policy.elements:
+      if key and key != policy.key:
+        value = '%s\\%s\\%s' % (hive, key, value)
+      rows.append((value, kind))
+    return rows
+
+  def _sanitize_version(self):
+    """Returned sanitized List of supported versions."""
+    if 'version' in self.options:
+      return self._parse_list('version')
+    return None
 
   def _add_version(self, version):
-    """Add RST row for :version: directive.
+    """Add badge for :version: directive.
 
     Args:
       version: String version to render to row.
     """
-    self._rst.append('    %s' % self._convert_to_badge(version), self.c)
+    self._add_footer(version)
 
-  def _add_reference(self, ref):
-    """Add RST row for :ref: directive.
+  def _render(self):
+    """Generate rendered nodes.
 
-    Args:
-      ref: String reference to render to row.
-    """
-    self._rst.append('    %s' % badges.ref(ref), self.c)
-
-  def run(self):
-    """Generated rendered rst.
-
-    Data is processed to a in-memory rst list, then rendered directly to the
-    current document.
+    Returns:
+      elements.ct_data containing the rendered table.
     """
     self._add_dropdown_header()
-    self._add_panel_template()
-    self._add_path(self.gen_label(self._sanitize_path()))
-    for row in self._sanitize_data(30):
+    self._add_grid()
+    policy = self._sanitize_policy()
+    if policy and 'path' not in self.options:
+      self.options['path'] = (' %s ' % self.rep).join(admx.index.path(policy))
+    path = self.gen_label(self._sanitize_path())
+    self._add_path(path)
+    data = self._sanitize_data()
+    if policy:
+      data.extend(self._policy_rows(policy))
+    self._add_group(path, data)
+    for row in data:
       self._add_value_row(row)
     self._add_update(self._sanitize_update())
     if 'version' in self.options:
       for v in self._sanitize_version():
         self._add_version(v)
+    elif policy and policy.supported in admx.index.supported:
+      self._add_version(admx.index.supported[policy.supported])
     if 'ref' in self.options:
       for r in self._sanitize_ref():
         self._add_reference(r)
 
-    node = nodes.section()
-    node.document = self.state.document
-    nested_parse_with_titles(self.state, self._rst, node)
-
-    return node.children
-
-def setup(app):
-  app.add_config_value('ct_gpo_separator', config.DEFAULT_SEPARATOR, '')
-  app.add_config_value('ct_gpo_separator_replace', config.DEFAULT_REPLACE, '')
-  app.add_directive('gpo', Gpo)
+    return self._dropdown
@@ -1,12 +1,7 @@
 # gui config table.
 
-from .. import config
 from .. import ct
-from . import badges
-from docutils import nodes
-from docutils.statemachine import ViewList
 from docutils.parsers.rst import directives
-from sphinx.util.nodes import nested_parse_with_titles
 
 
 class Gui(ct.AbstractConfigTable):
@@ -19,6 +14,8 @@ class Gui(ct.AbstractConfigTable):
     :nav:          String GUI navigation path to application.
     :label:        Alternative generic label, defualt 'GUI'.
     :value{0..35}: List of Option, Setting strings for GUI.
+    :values:       Option, Setting rows, one per line. Unlimited rows.
+    :source:       CSV/TSV/JSON/YAML file of Option, Setting rows.
     :ref:          List of reference URI's.
     :update:       String datetime last time references/settings were checked.
     :delim:        Custom delimeter to use instead of config.DEFAULT_DELIM.
@@ -71,6 +68,8 @@ class Gui(ct.AbstractConfigTable):
   final_argument_whitespace = True
   has_content = True
   add_index = True
+  label = 'GUI'
+  widths = (6, 6)
   option_spec = {
     'path': directives.unchanged_required,
     'value0': directives.unchanged,
@@ -109,6 +108,8 @@ class Gui(ct.AbstractConfigTable):
     'value33': directives.unchanged,
     'value34': directives.unchanged,
     'value35': directives.unchanged,
+    'values': directives.unchanged,
+    'source': directives.path,
     'ref': directives.unchanged,
     'update': directives.unchanged,
     'delim': directives.unchanged,
@@ -118,111 +119,40 @@ class Gui(ct.AbstractConfigTable):
     'label': directives.unchanged,
   }
 
-  def __init__(self, *args, **kwargs):
-    super().__init__(*args, **kwargs)
-    self.sep = config.get_sep(
-      self.state.document.settings.env.config.ct_gpo_separator,
-      self.state.document.settings.env.config.ct_separator)
-    self.rep = config.get_rep(
-      self.state.document.settings.env.config.ct_gpo_separator_replace,
-      self.state.document.settings.env.config.ct_separator_replace)
-
   def _sanitize_version(self):
     """Returned sanitized List of supported versions."""
     if 'version' in self.options:
       return self._parse_list('version')
     return None
 
-  def _add_value_row(self, data):
-    """Add RST row for :value: directive.
-
-    Args:
-      data: List of strings to render to row.
-    """
-    for x in data:
-      self._rst.append("    ---", self.c)
-      self._rst.append("    :column: col-md-6", self.c)
-      self._rst.append("    %s" % repr(x)[1:-1], self.c)
-
   def _add_dropdown_header(self):
     if 'generic' in self.options:
-      if 'label' in self.options:
-        self._rst.append(".. dropdown:: %s" % self.options['label'], self.c)
-      else:
-        self._rst.append(".. dropdown:: GUI", self.c)
-      self._rst.append("  :title: font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
+      self._new_dropdown(self.options.get('label', self.label), generic=True)
     else:
-      self._rst.append(".. dropdown:: %s" % self.title.astext(), self.c)
-      self._rst.append("  :container: + shadow", self.c)
-      self._rst.append("  :title: bg-primary text-white font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
-
-    if 'open' in self.options:
-      self._rst.append("  :open:", self.c)
-
-  def _add_panel_template(self):
-    self._rst.append("", self.c)
-    self._rst.append("  .. panels::", self.c)
-    self._rst.append("    :container: container-lg pb-3", self.c)
-    self._rst.append("    :column: col-lg-4 col-md-4 col-sm-6 col-xs-12 p-0 m-0", self.c)
-    self._rst.append("    :card: border-0", self.c)
-    self._rst.append("", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    for line in self.content:
-      self._rst.append("    %s" % line, self.c)
-
-  def _add_path(self, path):
-    """Add RST row for :path: directive.
-
-    Args:
-      path: String to render to row.
-    """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0 font-weight-bold", self.c)
-    self._rst.append("    :body: bg-light", self.c)
-    # repr is used to auto-escape strings for rendering in sudo-rst (e.g. \\)
-    # returns quoted, so strip quotes to ensure render correctly.
-    self._rst.append("    %s" % repr(path)[1:-1], self.c)
-
-  def _add_update(self, update):
-    """Add RST row for :update: directive.
-
-    Args:
-      update: String update time to render to row.
-    """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    self._rst.append("    :body: text-right", self.c)
-    self._rst.append("    %s" % badges.update(update), self.c)
+      self._new_dropdown(self.title.astext())
 
   def _add_version(self, version):
-    """Add RST row for :version: directive.
+    """Add badge for :version: directive.
 
     Args:
       version: String version to render to row.
     """
-    self._rst.append('    %s' % self._convert_to_badge(version), self.c)
+    self._add_footer(version)
 
-  def _add_reference(self, ref):
-    """Add RST row for :ref: directive.
+  def _render(self):
+    """Generate rendered nodes.
 
-    Args:
-      ref: String reference to render to row.
-    """
-    self._rst.append('    %s' % badges.ref(ref), self.c)
-
-  def run(self):
-    """Generated rendered rst.
-
-    Data is processed to a in-memory rst list, then rendered directly to the
-    current document.
+    Returns:
+      elements.ct_data containing the rendered table.
     """
     self._add_dropdown_header()
-    self._add_panel_template()
+    self._add_grid()
     self._add_nav_to_path()
-    self._add_path(self.gen_label(self._sanitize_path()))
-    for row in self._sanitize_data(35):
+    path = self.gen_label(self._sanitize_path())
+    self._add_path(path)
+    data = self._sanitize_data()
+    self._add_group(path, data)
+    for row in data:
       self._add_value_row(row)
     self._add_update(self._sanitize_update())
     if 'version' in self.options:
@@ -232,13 +162,4 @@ class Gui(ct.AbstractConfigTable):
       for r in self._sanitize_ref():
         self._add_reference(r)
 
-    node = nodes.section()
-    node.document = self.state.document
-    nested_parse_with_titles(self.state, self._rst, node)
-
-    return node.children
-
-def setup(app):
-  app.add_config_value('ct_gui_separator', config.DEFAULT_SEPARATOR, '')
-  app.add_config_value('ct_gui_separator_replace', config.DEFAULT_REPLACE, '')
-  app.add_directive('gui', Gui)
+    return self._dropdown
@@ -1,12 +1,9 @@
 # regedit config table.
 
-from .. import config
 from .. import ct
-from . import badges
-from docutils import nodes
-from docutils.statemachine import ViewList
+from .. import sources
+from . import regfile
 from docutils.parsers.rst import directives
-from sphinx.util.nodes import nested_parse_with_titles
 
 
 class Regedit(ct.AbstractConfigTable):
@@ -15,8 +12,15 @@ class Regedit(ct.AbstractConfigTable):
   Badges ({KEYWORD}) are automatically converted using badges.badges.
 
   Directives:
-    :path:        String registry key path. Required.
+    :path:        String registry key path. Required unless :reg: is used.
     :value{0..9}: List of Name, Type, Value strings for path.
+    :values:      Name, Type, Value rows, one per line. Unlimited rows.
+    :source:      CSV/TSV/JSON/YAML file of Name, Type, Value rows.
+    :reg:         Registry export (.reg) file. Each key is added as a path,
+                  followed by its values.
+    :key:         String key prefix to import from :reg: (case insensitive,
+                  hive abbreviations such as HKLM are expanded). Default: all
+                  keys.
     :ref:         List of reference URI's.
     :update:      String datetime last time references/settings were checked.
     :delim:       Custom delimeter to use instead of config.DEFAULT_DELIM.
@@ -58,12 +62,23 @@ class Regedit(ct.AbstractConfigTable):
 
       .. warning::
         Additional rst can be used here.
+
+    .. regedit:: Imported from a registry export.
+      :reg:    policies.reg
+      :key:    HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Microsoft\Windows
+      :update: 2021-01-01
+
+      Imported from a registry export.
   """
   required_arguments = 1
   optional_arguments = 0
   final_argument_whitespace = True
   has_content = True
   add_index = True
+  label = 'Registry'
+  widths = (4, 4, 4)
+  anchor = True
+  path_options = ('source', 'reg')
   option_spec = {
     'path': directives.unchanged_required,
     'value0': directives.unchanged,
@@ -76,6 +91,10 @@ class Regedit(ct.AbstractConfigTable):
     'value7': directives.unchanged,
     'value8': directives.unchanged,
     'value9': directives.unchanged,
+    'values': directives.unchanged,
+    'source': directives.path,
+    'reg': directives.path,
+    'key': directives.unchanged,
     'ref': directives.unchanged,
     'update': directives.unchanged,
     'delim': directives.unchanged,
@@ -83,94 +102,54 @@ class Regedit(ct.AbstractConfigTable):
     'generic': directives.flag,
   }
 
-  def _add_value_row(self, data):
-    """Add RST row for :value: directive.
+  def _sanitize_reg(self):
+    """Load keys from the :reg: file, filtered by :key:.
 
-    Args:
-      data: List of strings to render to row.
-    """
-    for x in data:
-      self._rst.append("    ---", self.c)
-      self._rst.append("    %s" % repr(x)[1:-1], self.c)
-
-  def _add_dropdown_header(self):
-    if 'generic' in self.options:
-      self._rst.append(".. dropdown:: Registry", self.c)
-      self._rst.append("  :title: font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
-    else:
-      self._rst.append(".. dropdown:: %s" % self.title.astext(), self.c)
-      self._rst.append("  :container: + shadow", self.c)
-      self._rst.append("  :title: bg-primary text-white font-weight-bold", self.c)
-      self._rst.append("  :animate: fade-in", self.c)
-
-    if 'open' in self.options:
-      self._rst.append("  :open:", self.c)
-
-  def _add_panel_template(self):
-    self._rst.append("", self.c)
-    self._rst.append("  .. panels::", self.c)
-    self._rst.append("    :container: container-lg pb-3", self.c)
-    self._rst.append("    :column: col-lg-4 col-md-4 col-sm-6 col-xs-12 p-0 m-0", self.c)
-    self._rst.append("    :card: border-0", self.c)
-    self._rst.append("", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    for line in self.content:
-      self._rst.append("    %s" % line, self.c)
-
-  def _add_path(self, path):
-    """Add RST row for :path: directive.
-
-    Args:
-      path: String to render to row.
-    """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0 font-weight-bold", self.c)
-    self._rst.append("    :body: bg-light", self.c)
-    # repr is used to auto-escape strings for rendering in sudo-rst (e.g. \\)
-    # returns quoted, so strip quotes to ensure render correctly.
-    self._rst.append("    %s" % repr(path)[1:-1], self.c)
-
-  def _add_update(self, update):
-    """Add RST row for :update: directive.
-
-    Args:
-      update: String update time to render to row.
-    """
-    self._rst.append("    ---", self.c)
-    self._rst.append("    :column: col-lg-12 p-0 m-0", self.c)
-    self._rst.append("    :body: text-right", self.c)
-    self._rst.append("    %s" % badges.update(update), self.c)
+    Files are parsed once per build for each :key:, see regfile.parse.
 
-  def _add_reference(self, ref):
-    """Add RST row for :ref: directive.
+    Returns:
+      List of Tuples of (String key, List of Name, Type, Value rows).
 
-    Args:
-      ref: String reference to render to row.
+    Raises:
+      DirectiveError: if the file cannot be read or contains no matching keys.
     """
-    self._rst.append('    %s' % badges.ref(ref), self.c)
-
-  def run(self):
-    """Generated rendered rst.
-
-    Data is processed to a in-memory rst list, then rendered directly to the
-    current document.
+    prefix = self.options.get('key', '').strip() or None
+    with self._timer.phase('sanitize'):
+      try:
+        keys = sources.files.get(('reg', self.paths['reg'], prefix),
+                                 regfile.load, self.paths['reg'], prefix)
+      except sources.SourceError as e:
+        raise self.error(str(e))
+    if not keys:
+      raise self.error('%s: no registry keys%s' % (
+          self.options['reg'], prefix and ' under %s' % prefix or ''))
+    return keys
+
+  def _render(self):
+    """Generate rendered nodes.
+
+    Returns:
+      elements.ct_data containing the rendered table.
     """
     self._add_dropdown_header()
-    self._add_panel_template()
-    self._add_path(self._sanitize_path())
-    for row in self._sanitize_data():
+    self._add_grid()
+    path = None
+    if 'path' in self.options or 'reg' not in self.paths:
+      path = self._sanitize_path()
+      self._add_path(path)
+    data = self._sanitize_data()
+    self._add_group(path, data)
+    for row in data:
       self._add_value_row(row)
+    if 'reg' in self.paths:
+      for key, rows in self._sanitize_reg():
+        self._add_path(key)
+        self._add_group(key, rows)
+        for row in rows:
+          self._add_value_row(row)
     self._add_update(self._sanitize_update())
     if 'ref' in self.options:
       for r in self._sanitize_ref():
         self._add_reference(r)
 
-    node = nodes.section()
-    node.document = self.state.document
-    nested_parse_with_titles(self.state, self._rst, node)
-
-    return node.children
-
-def setup(app):
-  app.add_directive('regedit', Regedit)
+    return self._dropdown
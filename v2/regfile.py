@@ -0,0 +1,216 @@
+# Streaming windows registry export (.reg) parser.
+#
+# Reads 'Windows Registry Editor Version 5.00' (UTF-16) and 'REGEDIT4' exports
+# line by line, joining continuation lines, so memory use depends on the keys
+# kept rather than the size of the file. Value types are mapped to {REG_*}
+# badges.
+
+import codecs
+from .. import sources
+from . import regkeys
+
+# hex(n): value types.
+TYPES = {
+  '0': '{REG_NONE}',
+  '1': '{REG_SZ}',
+  '2': '{REG_EXPAND_SZ}',
+  '3': '{REG_BINARY}',
+  '4': '{REG_DWORD}',
+  '5': '{REG_DWORD_BIG_ENDIAN}',
+  '6': '{REG_LINK}',
+  '7': '{REG_MULTI_SZ}',
+  '8': '{REG_RESOURCE_LIST}',
+  '9': '{REG_FULL_RESOURCE_DESCRIPTOR}',
+  'a': '{REG_RESOURCE_REQUIREMENTS_LIST}',
+  'b': '{REG_QWORD}',
+}
+
+# Maximum number of bytes of binary data to display.
+MAX_BINARY = 32
+
+def _decoded(path):
+  """Yield decoded physical lines, detecting the encoding from the BOM.
+
+  Files without a BOM are decoded as UTF-8 per line, falling back to cp1252
+  (REGEDIT4 exports).
+  """
+  with open(path, 'rb') as f:
+    bom = f.read(3)
+  if bom.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+    with open(path, encoding='utf-16') as f:
+      yield from f
+    return
+  with open(path, 'rb') as f:
+    if bom == codecs.BOM_UTF8:
+      f.seek(3)
+    for raw in f:
+      try:
+        yield raw.decode('utf-8')
+      except UnicodeDecodeError:
+        yield raw.decode('cp1252', 'replace')
+
+def _lines(path):
+  """Yield logical lines, joining lines continued with a trailing '\\'."""
+  parts = []
+  for line in _decoded(path):
+    line = line.rstrip('\r\n')
+    if parts:
+      line = line.lstrip()
+    if line.endswith('\\'):
+      parts.append(line[:-1])
+      continue
+    parts.append(line)
+    yield ''.join(parts)
+    parts = []
+  if parts:
+    yield ''.join(parts)
+
+def _unquote(text):
+  """Split a leading quoted string from text.
+
+  Returns:
+    Tuple of (String unescaped string, String remaining text).
+  """
+  result = []
+  i = 1
+  while i < len(text):
+    c = text[i]
+    if c == '\\' and i + 1 < len(text):
+      result.append(text[i + 1])
+      i += 2
+      continue
+    if c == '"':
+      return ''.join(result), text[i + 1:]
+    result.append(c)
+    i += 1
+  return ''.join(result), ''
+
+def _bytes(data):
+  return bytes.fromhex(''.join(data.split()).replace(',', ''))
+
+def _number(value, width):
+  return '0x%0*x (%d)' % (width, value, value)
+
+def _hex_value(kind, data):
+  """Format hex(kind): data for display."""
+  try:
+    raw = _bytes(data)
+  except ValueError:
+    return data
+  if kind in ('1', '2', '6'):
+    return raw.decode('utf-16-le', 'replace').rstrip('\x00')
+  if kind == '7':
+    return ', '.join(x for x in raw.decode('utf-16-le', 'replace').split('\x00') if x)
+  if kind == '4' and len(raw) == 4:
+    return _number(int.from_bytes(raw, 'little'), 8)
+  if kind == '5' and len(raw) == 4:
+    return _number(int.from_bytes(raw, 'big'), 8)
+  if kind == 'b' and len(raw) == 8:
+    return _number(int.from_bytes(raw, 'little'), 16)
+  text = ','.join('%02x' % x for x in raw[:MAX_BINARY])
+  if len(raw) > MAX_BINARY:
+    text += ',... (%d bytes)' % len(raw)
+  return text
+
+def parse_value(line):
+  """Parse a value line to a row.
+
+  Args:
+    line: String logical value line, e.g. '"Name"=dword:00000001'.
+
+  Returns:
+    Tuple of Strings (Name, Type badge, Value) or None if not a value line.
+  """
+  if line.startswith('@='):
+    name, data = '(Default)', line[2:]
+  elif line.startswith('"'):
+    name, rest = _unquote(line)
+    if not rest.startswith('='):
+      return None
+    data = rest[1:]
+  else:
+    return None
+  data = data.strip()
+  if data == '-':
+    return (name, '{DELETE}', '{DELETE}')
+  if data.startswith('"'):
+    return (name, '{REG_SZ}', _unquote(data)[0])
+  if data.lower().startswith('dword:'):
+    try:
+      return (name, '{REG_DWORD}', _number(int(data[6:], 16), 8))
+    except ValueError:
+      return (name, '{REG_DWORD}', data[6:])
+  if data.lower().startswith('hex:'):
+    return (name, '{REG_BINARY}', _hex_value('3', data[4:]))
+  if data.lower().startswith('hex(') and '):' in data:
+    kind, _, value = data[4:].partition('):')
+    kind = kind.lower().lstrip('0') or '0'
+    return (name, TYPES.get(kind, '{REG_BINARY}'), _hex_value(kind, value))
+  return (name, '', data)
+
+def _matches(key, prefix):
+  """Return True if key is prefix or a subkey of prefix.
+
+  Args:
+    key: String registry key.
+    prefix: Tuple of lowercase String key names, see regkeys.fold().
+  """
+  return regkeys.fold(regkeys.normalize(key))[:len(prefix)] == prefix
+
+def parse(path, prefix=None):
+  """Stream keys and values from a .reg file.
+
+  Args:
+    path: String absolute path to the .reg file.
+    prefix: String key prefix to filter keys on, normalized as registry keys
+        (see regkeys.normalize), e.g. 'HKLM\\SOFTWARE\\Policies'. Default: None
+        (all keys).
+
+  Yields:
+    Tuple of (String key, List of rows) for each matching key. Deleted keys
+    contain a single {DELETE} row.
+  """
+  prefix = regkeys.fold(regkeys.normalize(prefix or ''))
+  key = None
+  rows = None
+  for line in _lines(path):
+    line = line.strip()
+    if not line or line.startswith(';'):
+      continue
+    if line.startswith('[') and line.endswith(']'):
+      if rows is not None:
+        yield key, rows
+      key = line[1:-1]
+      rows = None
+      if key.startswith('-'):
+        key = key[1:]
+        if _matches(key, prefix):
+          yield key, [('(Key)', '{DELETE}', '{DELETE}')]
+        key = None
+      elif _matches(key, prefix):
+        rows = []
+      continue
+    if rows is not None:
+      row = parse_value(line)
+      if row:
+        rows.append(row)
+  if rows is not None:
+    yield key, rows
+
+def load(path, prefix=None):
+  """Parse matching keys from a .reg file.
+
+  Args:
+    path: String absolute path to the .reg file.
+    prefix: String key prefix to filter keys on. Default: None (all keys).
+
+  Returns:
+    List of Tuples of (String key, List of rows).
+
+  Raises:
+    sources.SourceError: if the file cannot be read.
+  """
+  try:
+    return list(parse(path, prefix))
+  except (OSError, UnicodeError) as e:
+    raise sources.SourceError('could not read registry file %s: %s' % (path, e))
@@ -0,0 +1,321 @@
+# Project wide registry key trie.
+#
+# regedit paths from the project index (see index.py) are normalized (hive
+# abbreviations such as HKLM expanded, whitespace around key separators and
+# from wrapped lines removed, case insensitive) and added to a trie of
+# registry keys in the build environment, so the settings under any key are
+# found in O(key depth). The trie is maintained incrementally: documents are
+# removed when purged and re-added once all documents are read, and pages
+# rendering a changed key (see regtree.py) are rewritten.
+#
+# .. regtree:: directives are rendered from the trie at write time, as a tree
+# of keys and values under the key, each value linking back to its regedit
+# table.
+
+import collections
+from docutils import nodes
+from sphinx.errors import NoUri
+from sphinx.transforms.post_transforms import SphinxPostTransform
+from .. import index
+from . import badges
+
+# Registry hive abbreviations.
+HIVES = {
+  'HKLM': 'HKEY_LOCAL_MACHINE',
+  'HKCU': 'HKEY_CURRENT_USER',
+  'HKCR': 'HKEY_CLASSES_ROOT',
+  'HKU': 'HKEY_USERS',
+  'HKCC': 'HKEY_CURRENT_CONFIG',
+}
+
+Entry = collections.namedtuple('Entry', ('docname', 'line', 'title', 'target', 'rows'))
+Entry.__doc__ = """regedit table settings for a registry key.
+
+  Attributes:
+    docname: String document name.
+    line: Integer line number of the directive.
+    title: String directive title.
+    target: String id of the rendered table, see index.Record.
+    rows: Tuple of (Name, Type, Value) row Tuples.
+"""
+
+def normalize(path):
+  """Normalize a registry key path.
+
+  Args:
+    path: String registry key, e.g. 'HKLM \\ SOFTWARE\\Policies\\'.
+
+  Returns:
+    Tuple of String key names, e.g. ('HKEY_LOCAL_MACHINE', 'SOFTWARE',
+    'Policies'). Empty if path contains no key names.
+  """
+  names = [' '.join(name.split()) for name in path.split('\\')]
+  names = [name for name in names if name]
+  if names and names[0].lower() == 'computer':
+    del names[0]
+  if names:
+    hive = names[0].upper()
+    if hive in HIVES or hive.startswith('HKEY_'):
+      names[0] = HIVES.get(hive, hive)
+  return tuple(names)
+
+def fold(names):
+  """Return the case insensitive trie key for normalized key names."""
+  return tuple(name.lower() for name in names)
+
+
+class Key(object):
+  """Registry key trie node.
+
+  Attributes:
+    name: String key name, as first added.
+    children: Dictionary of String lowercase name: Key subkeys.
+    entries: List of Entry settings for this key.
+  """
+  __slots__ = ('name', 'children', 'entries')
+
+  def __init__(self, name):
+    self.name = name
+    self.children = {}
+    self.entries = []
+
+
+class Trie(object):
+  """Trie of registry keys.
+
+  Attributes:
+    root: Key root, containing hives.
+    documents: Dictionary of String docname: List of Tuples of String key
+        names added for the document.
+  """
+
+  def __init__(self):
+    self.root = Key('')
+    self.documents = {}
+
+  def find(self, names):
+    """Find a key.
+
+    Args:
+      names: Tuple of String key names, see normalize().
+
+    Returns:
+      Key or None.
+    """
+    key = self.root
+    for name in fold(names):
+      key = key.children.get(name)
+      if key is None:
+        return None
+    return key
+
+  def add(self, names, entry):
+    """Add settings for a key, creating the key if needed.
+
+    Args:
+      names: Tuple of String key names, see normalize().
+      entry: Entry settings.
+    """
+    key = self.root
+    for name in names:
+      child = key.children.get(name.lower())
+      if child is None:
+        child = key.children[name.lower()] = Key(name)
+      key = child
+    key.entries.append(entry)
+    self.documents.setdefault(entry.docname, []).append(names)
+
+  def _remove(self, key, folded, docname, removed):
+    """Remove docname entries under folded key names, pruning empty keys."""
+    if folded:
+      child = key.children.get(folded[0])
+      if child is not None and self._remove(child, folded[1:], docname, removed):
+        del key.children[folded[0]]
+    else:
+      removed.extend(e for e in key.entries if e.docname == docname)
+      key.entries = [e for e in key.entries if e.docname != docname]
+    return not key.entries and not key.children
+
+  def remove(self, docname):
+    """Remove all settings of a document.
+
+    Args:
+      docname: String document name.
+
+    Returns:
+      List of (Tuple of lowercase String key names, Entry) Tuples removed.
+    """
+    result = []
+    for folded in set(map(fold, self.documents.pop(docname, []))):
+      removed = []
+      self._remove(self.root, folded, docname, removed)
+      result.extend((folded, entry) for entry in removed)
+    return result
+
+
+def trie(env):
+  try:
+    return env.ct_regkeys
+  except AttributeError:
+    env.ct_regkeys = Trie()
+    return env.ct_regkeys
+
+def _usage(env):
+  try:
+    return env.ct_regtree_usage
+  except AttributeError:
+    env.ct_regtree_usage = {}
+    return env.ct_regtree_usage
+
+def note(env, names):
+  """Record a key rendered by a regtree directive in the document being read.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    names: Tuple of String key names, see normalize().
+  """
+  usage = _usage(env)
+  usage[env.docname] = usage.get(env.docname, frozenset()).union([fold(names)])
+
+
+class regtree(nodes.General, nodes.Element):
+  """Registry key tree placeholder, rendered from the trie at write time.
+
+  Attributes:
+    key: Tuple of String key names, see normalize().
+  """
+
+
+def _title(key, names):
+  """Collapse chains of keys without settings into a single title.
+
+  Returns:
+    Tuple of (Key last key in the chain, String backslash joined names).
+  """
+  names = list(names)
+  while not key.entries and len(key.children) == 1:
+    key = next(iter(key.children.values()))
+    names.append(key.name)
+  return key, '\\'.join(names)
+
+def _entry(entry, builder, docname):
+  """Render the settings of a regedit table, linking back to the table."""
+  item = nodes.list_item()
+  para = nodes.paragraph()
+  try:
+    uri = builder.get_relative_uri(docname, entry.docname)
+  except NoUri:
+    para += nodes.Text(entry.title)
+  else:
+    if entry.target:
+      uri += '#' + entry.target
+    para += nodes.reference('', entry.title, internal=True, refuri=uri)
+  item += para
+  if entry.rows:
+    rows = nodes.bullet_list()
+    for row in entry.rows:
+      row = tuple(row) + ('',) * (3 - len(row))
+      para = nodes.paragraph()
+      para += nodes.literal(row[0], row[0])
+      for cell in row[1:3]:
+        if cell:
+          para += nodes.Text(' ')
+          para.extend(badges.text_nodes(cell))
+      rows += nodes.list_item('', para)
+    item += rows
+  return item
+
+def _key(key, names, builder, docname):
+  """Render a key, its settings and its subkeys as a list item."""
+  key, title = _title(key, names)
+  item = nodes.list_item()
+  item += nodes.paragraph('', '', nodes.literal(title, title))
+  if key.entries or key.children:
+    children = nodes.bullet_list()
+    for entry in sorted(key.entries, key=lambda e: (e.docname, e.line)):
+      children += _entry(entry, builder, docname)
+    for name in sorted(key.children):
+      children += _key(key.children[name], (key.children[name].name,), builder, docname)
+    item += children
+  return item
+
+def render(env, builder, docname, names):
+  """Render the subtree under a key.
+
+  Args:
+    env: sphinx BuildEnvironment.
+    builder: sphinx Builder, used to link to regedit tables.
+    docname: String document name being written.
+    names: Tuple of String key names, see normalize().
+
+  Returns:
+    nodes.Node containing the key tree.
+  """
+  key = trie(env).find(names)
+  if key is None:
+    return nodes.paragraph('', 'No registry settings under %s.' % '\\'.join(names))
+  return nodes.bullet_list('', _key(key, names, builder, docname), classes=['ct-regtree'])
+
+
+class RenderTrees(SphinxPostTransform):
+  """Render regtree placeholders from the registry key trie."""
+  default_priority = 100
+
+  def run(self, **kwargs):
+    for node in list(self.document.traverse(regtree)):
+      node.replace_self(render(self.env, self.app.builder, self.env.docname, node['key']))
+
+
+# Documents read or removed in this build, and the (lowercase key names,
+# Entry) settings they removed.
+_pending = set()
+_removed = set()
+
+def builder_inited(app):
+  _pending.clear()
+  _removed.clear()
+
+def env_purge_doc(app, env, docname):
+  _removed.update(trie(env).remove(docname))
+  _pending.add(docname)
+  _usage(env).pop(docname, None)
+
+def env_merge_info(app, env, docnames, other):
+  usage = _usage(env)
+  other = _usage(other)
+  for docname in docnames:
+    if docname in other:
+      usage[docname] = other[docname]
+
+def env_updated(app, env):
+  """Add regedit tables of documents read in this build to the trie.
+
+  Returns:
+    List of String docnames rendering a key whose settings changed.
+  """
+  keys = trie(env)
+  added = set()
+  for docname in sorted(_pending):
+    for record in index.document(env, docname):
+      if record.directive != 'regedit':
+        continue
+      for path, rows in record.groups:
+        names = normalize(path or '')
+        if names:
+          entry = Entry(docname, record.line, record.title, record.target, rows)
+          keys.add(names, entry)
+          added.add((fold(names), entry))
+  changed = {names for names, _ in added ^ _removed}
+  _pending.clear()
+  _removed.clear()
+  prefixes = {names[:i] for names in changed for i in range(len(names) + 1)}
+  return [docname for docname, used in _usage(env).items()
+          if not prefixes.isdisjoint(used)]
+
+def setup(app):
+  app.add_node(regtree)
+  app.add_post_transform(RenderTrees)
+  app.connect('builder-inited', builder_inited)
+  app.connect('env-purge-doc', env_purge_doc)
+  app.connect('env-merge-info', env_merge_info)
+  app.connect('env-updated', env_updated)
@@ -0,0 +1,33 @@
+# .. regtree:: HKLM\SOFTWARE\Policies
+#   Render every registry key and value set by regedit tables under a key, as a
+#   tree linking back to each regedit table. Rendered at write time from the
+#   project wide registry key trie (see regkeys.py), so the tree is updated
+#   whenever a regedit table under the key changes.
+
+from sphinx.util.docutils import SphinxDirective
+from . import regkeys
+
+
+class RegTree(SphinxDirective):
+  """Generate a registry key tree in a sphinx document.
+
+  Key paths are normalized: hive abbreviations (HKLM, HKCU, HKCR, HKU, HKCC)
+  are expanded, keys are case insensitive and whitespace around key
+  separators or from wrapped lines is removed.
+
+  Examples:
+    .. regtree:: HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows
+  """
+  required_arguments = 1
+  optional_arguments = 0
+  final_argument_whitespace = True
+  has_content = False
+
+  def run(self):
+    names = regkeys.normalize(self.arguments[0])
+    if not names:
+      raise self.error('invalid registry key: %s' % self.arguments[0])
+    regkeys.note(self.env, names)
+    node = regkeys.regtree(key=names)
+    self.set_source_info(node)
+    return [node]